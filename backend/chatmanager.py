@@ -1,21 +1,83 @@
 import asyncio
+import functools
 import json
 import os
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from queue import Queue
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Set, Union
 
 import websockets
 from fastapi import WebSocket, WebSocketDisconnect
 
+from autogen.oai.client import OpenAIWrapper
+
+from .codeexecutors import CodeExecutorPool
 from .datamodel import Message, SocketMessage, Workflow
+from .filetracker import create_file_tracker
+from .messagebus import MessageBus
 from .utils import (
     extract_successful_code_blocks,
-    get_modified_files,
+    sanitize_model,
     summarize_chat_history,
 )
-from .workflowmanager import WorkflowManager
+from .workflowmanager import WorkflowManager, WorkflowManagerPool
+
+
+class WorkflowExecutionPool:
+    """
+    A bounded pool of worker threads used to run blocking workflow executions off the event loop.
+    Runs beyond `max_workers` wait in a queue of at most `max_queue_size` entries; further
+    submissions are rejected so that an overloaded server fails fast instead of piling up work.
+    """
+
+    def __init__(self, max_workers: int = 16, max_queue_size: int = 64) -> None:
+        """
+        Initializes the pool.
+
+        :param max_workers: The maximum number of workflows executing concurrently.
+        :param max_queue_size: The maximum number of workflows waiting for a free worker.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_queue_size < 0:
+            raise ValueError("max_queue_size must not be negative")
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="autogenstudio-workflow")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue_size)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Runs `func(*args, **kwargs)` on a worker thread and awaits its result.
+
+        :param func: The blocking callable to execute.
+        :return: The value returned by `func`.
+        :raises RuntimeError: If all workers are busy and the wait queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise RuntimeError(
+                f"Server is busy: {self.max_workers} workflows running and {self.max_queue_size} queued. "
+                "Please try again later."
+            )
+        try:
+            future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        except Exception:
+            self._slots.release()
+            raise
+        # release the slot when the work finishes, even if the awaiting request was cancelled
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stops accepting new work and releases the worker threads.
+
+        :param wait: Whether to block until running workflows complete.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
 
 
 class AutoGenChatManager:
@@ -24,22 +86,38 @@ class AutoGenChatManager:
     using an automated workflow configuration and message queue.
     """
 
-    def __init__(self, message_queue: Queue) -> None:
+    def __init__(
+        self,
+        message_bus: Optional[MessageBus] = None,
+        execution_pool: Optional[WorkflowExecutionPool] = None,
+        workflow_pool: Optional[WorkflowManagerPool] = None,
+        stream_tokens: bool = False,
+        executor_pool: Optional[CodeExecutorPool] = None,
+    ) -> None:
         """
-        Initializes the AutoGenChatManager with a message queue.
+        Initializes the AutoGenChatManager with a message bus.
 
-        :param message_queue: A queue to use for sending messages asynchronously.
+        :param message_bus: The bus used to deliver agent messages to connected clients.
+        :param execution_pool: The pool used by `a_chat` to run workflows off the event loop.
+        :param workflow_pool: The pool of warm workflow managers reused across turns of a session.
+        :param stream_tokens: Whether to stream partial LLM output to clients as `agent_token` messages.
+        :param executor_pool: The pool of code executors reused across turns of a session.
         """
-        self.message_queue = message_queue
+        self.message_bus = message_bus
+        self.execution_pool = execution_pool or WorkflowExecutionPool()
+        self.workflow_pool = workflow_pool or WorkflowManagerPool()
+        self.stream_tokens = stream_tokens
+        self.executor_pool = executor_pool or CodeExecutorPool()
 
-    def send(self, message: str) -> None:
+    def send(self, message: Dict) -> None:
         """
-        Sends a message by putting it into the message queue.
+        Publishes a message for the client connection it is addressed to. Safe to call from
+        workflow threads.
 
-        :param message: The message string to be sent.
+        :param message: The message to be sent, addressed via its `connection_id` key.
         """
-        if self.message_queue is not None:
-            self.message_queue.put_nowait(message)
+        if self.message_bus is not None:
+            self.message_bus.publish(message)
 
     def chat(
         self,
@@ -62,39 +140,62 @@ class AutoGenChatManager:
         :return: An instance of `Message` representing a response.
         """
 
-        # create a working director for workflow based on user_dir/session_id/time_hash
-        work_dir = os.path.join(
-            user_dir,
-            str(message.session_id),
-            datetime.now().strftime("%Y%m%d_%H-%M-%S"),
-        )
-        os.makedirs(work_dir, exist_ok=True)
-
         # if no flow config is provided, use the default
         if workflow is None:
             raise ValueError("Workflow must be specified")
 
-        workflow_manager = WorkflowManager(
-            workflow=workflow,
-            history=history,
-            work_dir=work_dir,
-            send_message_function=self.send,
-            connection_id=connection_id,
-        )
+        # reuse the agents from the previous turn of this session when possible, their conversation is
+        # populated from the history passed in, as for newly built agents
+        workflow_spec = workflow
+        workflow_manager = None
+        use_workflow_pool = message.session_id is not None
+        if use_workflow_pool:
+            workflow_manager = self.workflow_pool.acquire(message.session_id, workflow_spec)
+
+        if workflow_manager is not None:
+            workflow_manager.start_turn(history=history, connection_id=connection_id)
+        else:
+            # create a working director for workflow based on user_dir/session_id/time_hash
+            work_dir = os.path.join(
+                user_dir,
+                str(message.session_id),
+                datetime.now().strftime("%Y%m%d_%H-%M-%S"),
+            )
+            os.makedirs(work_dir, exist_ok=True)
+
+            workflow_manager = WorkflowManager(
+                workflow=workflow,
+                history=history,
+                work_dir=work_dir,
+                send_message_function=self.send,
+                connection_id=connection_id,
+                stream_tokens=self.stream_tokens,
+                executor_pool=self.executor_pool,
+            )
+        work_dir = workflow_manager.work_dir
 
         workflow = Workflow.model_validate(workflow)
 
         message_text = message.content.strip()
 
+        # record the files the agents write as they are written, instead of scanning the work dir afterwards
+        file_tracker = create_file_tracker(work_dir)
+        file_tracker.start()
         start_time = time.time()
-        workflow_manager.run(message=f"{message_text}", clear_history=False)
-        end_time = time.time()
+        try:
+            workflow_manager.run(message=f"{message_text}", clear_history=False)
+        except Exception:
+            workflow_manager.close()
+            raise
+        finally:
+            end_time = time.time()
+            file_tracker.stop()
 
         metadata = {
             "messages": workflow_manager.agent_history,
             "summary_method": workflow.summary_method,
             "time": end_time - start_time,
-            "files": get_modified_files(start_time, end_time, source_dir=work_dir),
+            "files": file_tracker.modified_files(),
         }
 
         output = self._generate_output(message_text, workflow_manager, workflow)
@@ -107,8 +208,66 @@ class AutoGenChatManager:
             session_id=message.session_id,
         )
 
+        if use_workflow_pool:
+            self.workflow_pool.release(message.session_id, workflow_spec, workflow_manager)
+        else:
+            # the code executors are reused by the next turn of the session
+            workflow_manager.close()
+
         return output_message
 
+    async def a_chat(self, **kwargs) -> Message:
+        """
+        Asynchronous version of `chat`. The workflow runs on the execution pool so the
+        event loop stays free to serve other requests while agents converse.
+
+        :param kwargs: The arguments accepted by `chat`.
+        :return: An instance of `Message` representing a response.
+        """
+        return await self.execution_pool.run(self.chat, **kwargs)
+
+    def summarize_history(
+        self, workflow: Dict, messages: List[Dict[str, Any]], previous_summary: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Summarizes session messages that fell out of a workflow's history window, using the LLM
+        of the workflow's receiver (or sender) agent.
+
+        :param workflow: The workflow specification.
+        :param messages: The messages to summarize, oldest first.
+        :param previous_summary: The summary of the messages before these, which the new messages are merged into.
+        :return: The summary, or None when neither agent has an LLM configured.
+        """
+        llm_config = None
+        for agent_type in ("receiver", "sender"):
+            agent = workflow.get(agent_type) or {}
+            llm_config = agent.get("config", {}).get("llm_config")
+            if llm_config and llm_config.get("config_list"):
+                break
+        else:
+            return None
+        client = OpenAIWrapper(config_list=[sanitize_model(model) for model in llm_config["config_list"]])
+        return summarize_chat_history(
+            task="Summarize the earlier conversation between the user and the assistant so it can be continued "
+            "without it: keep the facts, decisions, results and open questions.",
+            messages=[{"role": message["role"], "content": message["content"]} for message in messages],
+            client=client,
+            previous_summary=previous_summary,
+        )
+
+    async def a_summarize_history(
+        self, workflow: Dict, messages: List[Dict[str, Any]], previous_summary: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Asynchronous version of `summarize_history`, run on the execution pool.
+
+        :param workflow: The workflow specification.
+        :param messages: The messages to summarize, oldest first.
+        :param previous_summary: The summary of the messages before these, which the new messages are merged into.
+        :return: The summary, or None when neither agent has an LLM configured.
+        """
+        return await self.execution_pool.run(self.summarize_history, workflow, messages, previous_summary)
+
     def _generate_output(
         self,
         message_text: str,
@@ -154,56 +313,225 @@ class AutoGenChatManager:
         return output
 
 
+class MessageOutbox:
+    """
+    A bounded buffer of messages waiting to be written to a single WebSocket connection.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        """
+        Initializes an empty outbox.
+
+        :param maxsize: The maximum number of buffered messages.
+        """
+        self.maxsize = maxsize
+        self.messages: deque = deque()
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def put(self, message: Dict) -> bool:
+        """
+        Buffers a message if there is room for it.
+
+        :param message: The message to buffer.
+        :return: True if the message was buffered, False if the outbox is full.
+        """
+        if len(self.messages) >= self.maxsize:
+            return False
+        self.messages.append(message)
+        self._ready.set()
+        return True
+
+    def drop_oldest(self, message_types: Set[str]) -> bool:
+        """
+        Discards the oldest buffered message whose type is in `message_types`.
+
+        :param message_types: The message types that may be discarded.
+        :return: True if a message was discarded.
+        """
+        for index, message in enumerate(self.messages):
+            if message.get("type") in message_types:
+                del self.messages[index]
+                self.dropped += 1
+                return True
+        return False
+
+    async def get(self) -> Dict:
+        """
+        Waits for and removes the oldest buffered message.
+        """
+        while not self.messages:
+            self._ready.clear()
+            await self._ready.wait()
+        return self.messages.popleft()
+
+
 class WebSocketConnectionManager:
     """
     Manages WebSocket connections including sending, broadcasting, and managing the lifecycle of connections.
+
+    Each connection has its own bounded outbox, writer task and send lock, so a slow client only
+    delays its own messages. When a client falls `max_buffered_messages` behind, the
+    `slow_consumer_policy` decides what happens: "drop_oldest" discards the oldest intermediate
+    agent message (and disconnects the client if nothing can be discarded), while "disconnect"
+    closes the connection straight away.
     """
 
+    slow_consumer_policies = ["drop_oldest", "disconnect"]
+    # intermediate messages that may be discarded for slow clients; final responses are never dropped
+    droppable_message_types = {"agent_message", "agent_status", "agent_token"}
+
     def __init__(
         self,
-        active_connections: List[Tuple[WebSocket, str]] = None,
+        active_connections: Dict[str, Set[WebSocket]] = None,
         active_connections_lock: asyncio.Lock = None,
+        max_buffered_messages: int = 256,
+        slow_consumer_policy: str = "drop_oldest",
     ) -> None:
         """
-        Initializes WebSocketConnectionManager with an optional list of active WebSocket connections.
+        Initializes WebSocketConnectionManager with an optional mapping of active WebSocket connections.
 
-        :param active_connections: A list of tuples, each containing a WebSocket object and its corresponding client_id.
+        :param active_connections: A dictionary mapping each client_id to the set of its open WebSocket connections.
+        :param active_connections_lock: A lock guarding changes to the set of active connections.
+        :param max_buffered_messages: The maximum number of messages buffered per connection.
+        :param slow_consumer_policy: What to do when a connection's buffer is full, one of `slow_consumer_policies`.
         """
         if active_connections is None:
-            active_connections = []
-        self.active_connections_lock = active_connections_lock
-        self.active_connections: List[Tuple[WebSocket, str]] = active_connections
+            active_connections = {}
+        if slow_consumer_policy not in self.slow_consumer_policies:
+            raise ValueError(
+                f"Invalid slow consumer policy: {slow_consumer_policy}. "
+                f"Valid policies are: {self.slow_consumer_policies}"
+            )
+        self.active_connections_lock = active_connections_lock or asyncio.Lock()
+        self.active_connections: Dict[str, Set[WebSocket]] = active_connections
+        self.max_buffered_messages = max_buffered_messages
+        self.slow_consumer_policy = slow_consumer_policy
+        # reverse index so a socket can be removed without scanning every client
+        self.connection_clients: Dict[WebSocket, str] = {}
+        # per-connection outbound buffers drained by a writer task on the event loop
+        self.outboxes: Dict[WebSocket, MessageOutbox] = {}
+        self.writer_tasks: Dict[WebSocket, asyncio.Task] = {}
+        self.send_locks: Dict[WebSocket, asyncio.Lock] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def connection_count(self) -> int:
+        """
+        The number of open WebSocket connections.
+        """
+        return len(self.connection_clients)
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Sets the event loop that owns the WebSocket connections. Messages dispatched from
+        other threads are handed over to this loop.
+
+        :param loop: The running event loop.
+        """
+        self.loop = loop
+
+    def dispatch(self, message: Dict) -> None:
+        """
+        Queues a message for delivery to the connections matching its `connection_id`.
+        This method is thread-safe and does not block, so it can be subscribed to a `MessageBus`.
+
+        :param message: A JSON serializable dictionary with a `connection_id` key.
+        """
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self._route_message, message)
+
+    def _route_message(self, message: Dict) -> None:
+        """
+        Places a message on the outbound queue of each connection of the addressed client. Runs on the event loop.
+
+        :param message: A JSON serializable dictionary with a `connection_id` key.
+        """
+        for connection in list(self.active_connections.get(message.get("connection_id"), ())):
+            outbox = self.outboxes.get(connection)
+            if outbox is None or outbox.put(message):
+                continue
+            if self.slow_consumer_policy == "drop_oldest" and outbox.drop_oldest(self.droppable_message_types):
+                outbox.put(message)
+                continue
+            print(f"Slow consumer: {len(outbox)} messages buffered, closing connection")
+            # stop buffering for this connection right away; the close itself happens asynchronously
+            self.outboxes.pop(connection, None)
+            self.loop.create_task(self._close_connection(connection))
+
+    async def _close_connection(self, websocket: WebSocket) -> None:
+        """
+        Removes a connection and closes its socket.
+
+        :param websocket: The WebSocket instance to close.
+        """
+        await self.disconnect(websocket)
+        try:
+            await websocket.close(code=1013)
+        except Exception as e:
+            print(f"Error while closing WebSocket: {str(e)}")
+
+    async def _write_messages(self, websocket: WebSocket) -> None:
+        """
+        Drains the outbound queue of a connection, preserving message order.
+
+        :param websocket: The WebSocket instance whose queue is drained.
+        """
+        outbox = self.outboxes[websocket]
+        while True:
+            message = await outbox.get()
+            await self.send_message(message, websocket)
 
     async def connect(self, websocket: WebSocket, client_id: str) -> None:
         """
-        Accepts a new WebSocket connection and appends it to the active connections list.
+        Accepts a new WebSocket connection and registers it under its client_id.
 
         :param websocket: The WebSocket instance representing a client connection.
         :param client_id: A string representing the unique identifier of the client.
         """
         await websocket.accept()
+        if self.loop is None:
+            self.bind_loop(asyncio.get_running_loop())
         async with self.active_connections_lock:
-            self.active_connections.append((websocket, client_id))
-            print(f"New Connection: {client_id}, Total: {len(self.active_connections)}")
+            self.active_connections.setdefault(client_id, set()).add(websocket)
+            self.connection_clients[websocket] = client_id
+            self.outboxes[websocket] = MessageOutbox(maxsize=self.max_buffered_messages)
+            self.send_locks[websocket] = asyncio.Lock()
+            self.writer_tasks[websocket] = asyncio.create_task(self._write_messages(websocket))
+            print(f"New Connection: {client_id}, Total: {self.connection_count}")
 
     async def disconnect(self, websocket: WebSocket) -> None:
         """
-        Disconnects and removes a WebSocket connection from the active connections list.
+        Disconnects and removes a WebSocket connection from the active connections.
 
         :param websocket: The WebSocket instance to remove.
         """
         async with self.active_connections_lock:
-            try:
-                self.active_connections = [conn for conn in self.active_connections if conn[0] != websocket]
-                print(f"Connection Closed. Total: {len(self.active_connections)}")
-            except ValueError:
+            client_id = self.connection_clients.pop(websocket, None)
+            if client_id is None:
                 print("Error: WebSocket connection not found")
+                return
+            client_connections = self.active_connections.get(client_id)
+            if client_connections is not None:
+                client_connections.discard(websocket)
+                if not client_connections:
+                    del self.active_connections[client_id]
+            self.outboxes.pop(websocket, None)
+            self.send_locks.pop(websocket, None)
+            writer_task = self.writer_tasks.pop(websocket, None)
+            if writer_task is not None:
+                writer_task.cancel()
+            print(f"Connection Closed. Total: {self.connection_count}")
 
     async def disconnect_all(self) -> None:
         """
         Disconnects all active WebSocket connections.
         """
-        for connection, _ in self.active_connections[:]:
+        for connection in list(self.connection_clients):
             await self.disconnect(connection)
 
     async def send_message(self, message: Union[Dict, str], websocket: WebSocket) -> None:
@@ -213,8 +541,10 @@ class WebSocketConnectionManager:
         :param message: A JSON serializable dictionary containing the message to send.
         :param websocket: The WebSocket instance through which to send the message.
         """
+        # serialize writes per connection so a slow client never blocks sends to other clients
+        send_lock = self.send_locks.get(websocket) or asyncio.Lock()
         try:
-            async with self.active_connections_lock:
+            async with send_lock:
                 await websocket.send_json(message)
         except WebSocketDisconnect:
             print("Error: Tried to send a message to a closed WebSocket")
@@ -226,6 +556,16 @@ class WebSocketConnectionManager:
             print(f"Error in sending message: {str(e)}", message)
             await self.disconnect(websocket)
 
+    async def send_to_client(self, message: Dict, client_id: str) -> None:
+        """
+        Sends a JSON message to every connection of a single client.
+
+        :param message: A JSON serializable dictionary containing the message to send.
+        :param client_id: The identifier of the client to send the message to.
+        """
+        for connection in list(self.active_connections.get(client_id, ())):
+            await self.send_message(message, connection)
+
     async def broadcast(self, message: Dict) -> None:
         """
         Broadcasts a JSON message to all active WebSocket connections.
@@ -235,7 +575,7 @@ class WebSocketConnectionManager:
         # Create a message dictionary with the desired format
         message_dict = {"message": message}
 
-        for connection, _ in self.active_connections[:]:
+        for connection in list(self.connection_clients):
             try:
                 if connection.client_state == websockets.protocol.State.OPEN:
                     # Call send_message method with the message dictionary and current WebSocket connection
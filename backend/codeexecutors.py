@@ -0,0 +1,340 @@
+import json
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from hashlib import md5
+from pathlib import Path
+from typing import Any, List, Optional, Tuple, Union
+
+from loguru import logger
+
+from autogen.code_utils import PYTHON_VARIANTS, TIMEOUT_MSG
+from autogen.coding import (
+    CodeBlock,
+    CodeExecutor,
+    CodeExtractor,
+    DockerCommandLineCodeExecutor,
+    LocalCommandLineCodeExecutor,
+    MarkdownCodeExtractor,
+)
+from autogen.coding.base import CommandLineCodeResult
+from autogen.coding.utils import _get_file_name_from_content
+
+from .datamodel import CodeExecutionConfigTypes
+
+
+class LocalKernelCodeExecutor(CodeExecutor):
+    """
+    Runs Python code blocks in a long-lived local Python process (see `kernel.py`), so imports,
+    loaded data and variables stay in memory between code blocks and across the turns of a
+    session instead of being rebuilt by a fresh interpreter for every block. Shell code blocks
+    run in a subprocess as with `LocalCommandLineCodeExecutor`.
+
+    A code block running longer than `timeout` seconds is interrupted; if the kernel does not
+    respond to the interrupt, or stops unexpectedly, it is restarted and its state is lost.
+    """
+
+    def __init__(self, work_dir: Union[Path, str] = Path("."), timeout: int = 60, interrupt_timeout: float = 5) -> None:
+        """
+        Initializes the executor. The kernel is started when the first code block runs.
+
+        :param work_dir: The directory code is saved and run in.
+        :param timeout: Seconds after which a code block is interrupted.
+        :param interrupt_timeout: Seconds to wait for an interrupted code block before the kernel is restarted.
+        """
+        if timeout < 1:
+            raise ValueError("Timeout must be greater than or equal to 1.")
+        self._work_dir = Path(work_dir)
+        self._work_dir.mkdir(exist_ok=True)
+        self._timeout = timeout
+        self.interrupt_timeout = interrupt_timeout
+        self._process: Optional[subprocess.Popen] = None
+        self._responses: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+
+    @property
+    def code_extractor(self) -> CodeExtractor:
+        return MarkdownCodeExtractor()
+
+    @property
+    def work_dir(self) -> Path:
+        return self._work_dir
+
+    @property
+    def timeout(self) -> int:
+        return self._timeout
+
+    def execute_code_blocks(self, code_blocks: List[CodeBlock]) -> CommandLineCodeResult:
+        """
+        Runs the code blocks in order until one fails.
+
+        :param code_blocks: The code blocks to run.
+        :return: The combined output, the exit code of the last block and the file the first block was saved to.
+        """
+        output = ""
+        exit_code = 0
+        files = []
+        with self._lock:
+            for code_block in code_blocks:
+                lang = code_block.language.lower()
+                if lang not in PYTHON_VARIANTS and lang != "python":
+                    # shell and other languages run in a subprocess
+                    result = LocalCommandLineCodeExecutor(work_dir=self._work_dir, timeout=self._timeout).execute_code_blocks(
+                        [code_block]
+                    )
+                    output += result.output
+                    exit_code = result.exit_code
+                    if result.code_file:
+                        files.append(result.code_file)
+                else:
+                    try:
+                        filename = _get_file_name_from_content(code_block.code, self._work_dir)
+                    except ValueError:
+                        return CommandLineCodeResult(exit_code=1, output="Filename is not in the workspace")
+                    filename = filename or f"tmp_code_{md5(code_block.code.encode()).hexdigest()}.py"
+                    code_file = (self._work_dir / filename).resolve()
+                    code_file.write_text(code_block.code, encoding="utf-8")
+                    files.append(str(code_file))
+                    block_exit_code, block_output = self._run(code_block.code, str(code_file))
+                    output += block_output
+                    exit_code = block_exit_code
+                if exit_code != 0:
+                    break
+        return CommandLineCodeResult(exit_code=exit_code, output=output, code_file=files[0] if files else None)
+
+    def restart(self) -> None:
+        """
+        Restarts the kernel, clearing its state.
+        """
+        with self._lock:
+            self._kill()
+
+    def stop(self) -> None:
+        """
+        Stops the kernel.
+        """
+        with self._lock:
+            self._kill()
+
+    def _start(self) -> None:
+        env = os.environ.copy()
+        # plots are saved to files, there is no display to show them on
+        env.setdefault("MPLBACKEND", "Agg")
+        self._process = subprocess.Popen(
+            [sys.executable, "-u", os.path.join(os.path.dirname(__file__), "kernel.py")],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=self._work_dir,
+            env=env,
+            text=True,
+            encoding="utf-8",
+            # its own process group, so interrupts and restarts also reach the processes the code started
+            start_new_session=os.name == "posix",
+        )
+        self._responses = queue.Queue()
+        threading.Thread(target=self._read_responses, args=(self._process, self._responses), daemon=True).start()
+
+    @staticmethod
+    def _read_responses(process: subprocess.Popen, responses: "queue.Queue[Optional[str]]") -> None:
+        for line in process.stdout:
+            responses.put(line)
+        # the kernel stopped
+        responses.put(None)
+
+    def _kill(self) -> None:
+        if self._process is None:
+            return
+        try:
+            if os.name == "posix":
+                os.killpg(self._process.pid, signal.SIGKILL)
+            else:
+                self._process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+        self._process.wait()
+        self._process.stdin.close()
+        self._process = None
+
+    def _interrupt(self) -> None:
+        if os.name == "posix":
+            try:
+                os.killpg(self._process.pid, signal.SIGINT)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    def _run(self, code: str, filename: str) -> Tuple[int, str]:
+        if self._process is None or self._process.poll() is not None:
+            self._kill()
+            self._start()
+        request = {"code": code, "filename": filename, "cwd": str(self._work_dir.resolve())}
+        try:
+            self._process.stdin.write(json.dumps(request) + "\n")
+            self._process.stdin.flush()
+            line = self._responses.get(timeout=self._timeout)
+        except queue.Empty:
+            self._interrupt()
+            try:
+                line = self._responses.get(timeout=self.interrupt_timeout)
+            except queue.Empty:
+                self._kill()
+                return 124, f"\n{TIMEOUT_MSG}\nThe Python kernel did not stop on interrupt and was restarted, its state was lost."
+            if line is not None:
+                response = json.loads(line)
+                return 124, response["output"] + "\n" + TIMEOUT_MSG
+        except (BrokenPipeError, OSError):
+            line = None
+
+        if line is None:
+            exit_code = self._process.wait()
+            self._kill()
+            return 1, f"The Python kernel stopped unexpectedly (exit code {exit_code}), its state was lost and it will be restarted."
+        response = json.loads(line)
+        return response["exit_code"], response["output"]
+
+
+class ContainerInWorkDir:
+    """
+    Runs the commands of a Docker code executor's container in a subdirectory of its workspace,
+    so a container started for one work dir can execute code written to another one.
+    """
+
+    def __init__(self, container: Any, workdir: str) -> None:
+        self.container = container
+        self.workdir = workdir
+
+    def exec_run(self, cmd, **kwargs):
+        kwargs.setdefault("workdir", self.workdir)
+        return self.container.exec_run(cmd, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.container, name)
+
+
+class CodeExecutorPool:
+    """
+    Keeps the code executors of finished turns started, so later turns of the same session reuse
+    them instead of creating new ones (for Docker, starting a new container per agent and turn).
+
+    Executors are shared by the work dirs in the same parent directory, which `chat` creates per
+    session, and are rebound to the work dir of the turn acquiring them. Docker executors bind
+    that parent directory and run commands in the subdirectory of the current work dir. Idle
+    executors are stopped after `idle_ttl` seconds, and least recently used first when more than
+    `max_idle` are kept.
+    """
+
+    def __init__(self, idle_ttl: float = 600, max_idle: int = 16, docker_image: str = "python:3-slim") -> None:
+        """
+        Initializes an empty pool.
+
+        :param idle_ttl: Seconds after which an idle executor is stopped.
+        :param max_idle: The maximum number of idle executors kept. A value of 0 disables pooling.
+        :param docker_image: The image of the containers started for Docker code execution.
+        """
+        self.idle_ttl = idle_ttl
+        self.max_idle = max_idle
+        self.docker_image = docker_image
+        # id(executor) -> (key, released at, executor)
+        self._idle: "OrderedDict[int, Tuple[tuple, float, CodeExecutor]]" = OrderedDict()
+        self._keys: "weakref.WeakKeyDictionary[CodeExecutor, tuple]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def acquire(
+        self, code_execution_type: Union[CodeExecutionConfigTypes, str], work_dir: Union[str, Path]
+    ) -> CodeExecutor:
+        """
+        Takes an idle executor of the session out of the pool, or creates one.
+
+        :param code_execution_type: The code execution type, local, kernel or docker.
+        :param work_dir: The work dir the executor writes and runs code in.
+        :return: The code executor bound to the work dir.
+        """
+        code_execution_type = CodeExecutionConfigTypes(code_execution_type)
+        work_dir = Path(work_dir).resolve()
+        work_dir.mkdir(parents=True, exist_ok=True)
+        key = (code_execution_type, work_dir.parent)
+
+        with self._lock:
+            expired = self._evict(time.time())
+            executor = None
+            for executor_id, (idle_key, _, idle_executor) in self._idle.items():
+                if idle_key == key:
+                    executor = idle_executor
+                    del self._idle[executor_id]
+                    break
+        self._stop(expired)
+
+        if executor is None:
+            executor = self._create(code_execution_type, work_dir)
+            with self._lock:
+                self._keys[executor] = key
+        self._bind(executor, work_dir)
+        return executor
+
+    def release(self, executor: CodeExecutor) -> None:
+        """
+        Returns an executor to the pool after a turn.
+
+        :param executor: An executor created by `acquire`.
+        """
+        with self._lock:
+            key = self._keys.get(executor)
+            if key is None or self.max_idle <= 0:
+                expired = [executor]
+            else:
+                self._idle[id(executor)] = (key, time.time(), executor)
+                self._idle.move_to_end(id(executor))
+                expired = self._evict(time.time())
+        self._stop(expired)
+
+    def shutdown(self) -> None:
+        """
+        Stops all idle executors.
+        """
+        with self._lock:
+            expired = [executor for _, _, executor in self._idle.values()]
+            self._idle.clear()
+        self._stop(expired)
+
+    def _create(self, code_execution_type: CodeExecutionConfigTypes, work_dir: Path) -> CodeExecutor:
+        if code_execution_type == CodeExecutionConfigTypes.local:
+            return LocalCommandLineCodeExecutor(work_dir=work_dir)
+        elif code_execution_type == CodeExecutionConfigTypes.kernel:
+            return LocalKernelCodeExecutor(work_dir=work_dir)
+        elif code_execution_type == CodeExecutionConfigTypes.docker:
+            # bind the session directory, so the container can run code of every turn of the session
+            return DockerCommandLineCodeExecutor(image=self.docker_image, work_dir=work_dir, bind_dir=work_dir.parent)
+        raise ValueError(f"Invalid code execution type: {code_execution_type}")
+
+    @staticmethod
+    def _bind(executor: CodeExecutor, work_dir: Path) -> None:
+        executor._work_dir = work_dir
+        if isinstance(executor, DockerCommandLineCodeExecutor):
+            container = executor._container
+            if isinstance(container, ContainerInWorkDir):
+                container = container.container
+            executor._container = ContainerInWorkDir(container, f"/workspace/{work_dir.name}")
+
+    def _evict(self, now: float) -> list:
+        expired = []
+        for executor_id in [key for key, entry in self._idle.items() if now - entry[1] > self.idle_ttl]:
+            expired.append(self._idle.pop(executor_id)[2])
+        while len(self._idle) > self.max_idle:
+            expired.append(self._idle.popitem(last=False)[1][2])
+        return expired
+
+    @staticmethod
+    def _stop(executors: list) -> None:
+        for executor in executors:
+            stop = getattr(executor, "stop", None)
+            if stop is None:
+                continue
+            try:
+                stop()
+            except Exception as e:
+                logger.error(f"Error while stopping code executor: {e}")
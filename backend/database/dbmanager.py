@@ -1,9 +1,18 @@
+import base64
+import json
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from loguru import logger
-from sqlalchemy import exc
+from sqlalchemy import Enum, delete, event, exc, inspect, or_, text, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, SQLModel, and_, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ..datamodel import (
     Agent,
@@ -16,23 +25,124 @@ from ..datamodel import (
     Workflow,
     WorkflowAgentLink,
 )
-from .utils import init_db_samples
+from ..datamodel import Session as SessionModel
+from .utils import WorkflowSpecCache, agent_tree_cte, init_db_samples
 
 valid_link_types = ["agent_model", "agent_skill", "agent_agent", "workflow_agent"]
+# dialects whose INSERT supports ON CONFLICT DO UPDATE, used to upsert in a single statement
+upsert_dialects = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+# the primary model, secondary model, link model and its primary and secondary columns of each link type
+link_models = {
+    "agent_model": (Agent, Model, AgentModelLink, "agent_id", "model_id"),
+    "agent_skill": (Agent, Skill, AgentSkillLink, "agent_id", "skill_id"),
+    "agent_agent": (Agent, Agent, AgentLink, "parent_id", "agent_id"),
+    "workflow_agent": (Workflow, Agent, WorkflowAgentLink, "workflow_id", "agent_id"),
+}
+# link table columns referencing each model, their rows are removed along with the model
+link_columns = {
+    Agent: [
+        AgentSkillLink.agent_id,
+        AgentModelLink.agent_id,
+        WorkflowAgentLink.agent_id,
+        AgentLink.parent_id,
+        AgentLink.agent_id,
+    ],
+    Skill: [AgentSkillLink.skill_id],
+    Model: [AgentModelLink.model_id],
+    Workflow: [WorkflowAgentLink.workflow_id],
+}
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Encode the position of the last row of a page as an opaque cursor string"""
+    position = json.dumps([created_at.isoformat(), id])
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("utf-8")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor returned by encode_cursor into the (created_at, id) position it points at"""
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor.encode("utf-8")))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
 
 
 class DBManager:
     """A class to manage database operations"""
 
-    def __init__(self, engine_uri: str):
-        connection_args = {"check_same_thread": True} if "sqlite" in engine_uri else {}
-        self.engine = create_engine(engine_uri, connect_args=connection_args)
+    def __init__(
+        self,
+        engine_uri: str,
+        pool_size: int = 10,
+        max_overflow: int = 20,
+        pool_recycle: int = 1800,
+        pool_pre_ping: bool = True,
+        sqlite_busy_timeout: int = 30,
+        sqlite_mmap_size: int = 256 * 1024 * 1024,
+    ):
+        """
+        Create the database engine, tuned for the database the engine_uri points to.
+
+        SQLite databases are shared between threads through a connection pool and every
+        connection uses WAL journaling, synchronous=NORMAL, a busy timeout and memory-mapped I/O,
+        so readers do not block the writer. Other databases (e.g. Postgres) use a pre-pinged
+        connection pool with the given size, overflow and recycle time.
+
+        Args:
+            engine_uri (str): The database URI.
+            pool_size (int): The number of connections kept open in the pool.
+            max_overflow (int): The number of connections allowed beyond pool_size under load.
+            pool_recycle (int): Seconds after which a pooled connection is replaced.
+            pool_pre_ping (bool): Whether to test connections for liveness when checking them out.
+            sqlite_busy_timeout (int): Seconds a SQLite connection waits for a lock before failing.
+            sqlite_mmap_size (int): Bytes of a SQLite database file accessed through memory-mapped I/O.
+        """
+        self.is_sqlite = engine_uri.startswith("sqlite")
+        self.sqlite_busy_timeout = sqlite_busy_timeout
+        self.sqlite_mmap_size = sqlite_mmap_size
+        if self.is_sqlite:
+            engine_args = {"connect_args": {"check_same_thread": False, "timeout": sqlite_busy_timeout}}
+            # an in-memory database lives in a single connection that all threads must share
+            if make_url(engine_uri).database in (None, "", ":memory:"):
+                engine_args["poolclass"] = StaticPool
+            else:
+                engine_args.update({"pool_size": pool_size, "max_overflow": max_overflow})
+        else:
+            engine_args = {
+                "pool_size": pool_size,
+                "max_overflow": max_overflow,
+                "pool_recycle": pool_recycle,
+                "pool_pre_ping": pool_pre_ping,
+            }
+        self.engine_uri = engine_uri
+        self.engine_args = engine_args
+        self.engine = create_engine(engine_uri, **engine_args)
+        if self.is_sqlite:
+            event.listen(self.engine, "connect", self._configure_sqlite_connection)
+        self.workflow_cache = WorkflowSpecCache()
         # run_migration(engine_uri=engine_uri)
 
+    def _configure_sqlite_connection(self, dbapi_connection, connection_record):
+        """Apply the SQLite pragmas to a new connection"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        # enforce foreign keys so deleting a session cascades to its messages
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA busy_timeout={int(self.sqlite_busy_timeout * 1000)}")
+        cursor.execute(f"PRAGMA mmap_size={int(self.sqlite_mmap_size)}")
+        cursor.close()
+
     def create_db_and_tables(self):
         """Create a new database and tables"""
         try:
             SQLModel.metadata.create_all(self.engine)
+            # create_all skips tables that already exist, add columns and indexes introduced since they were created
+            self._add_missing_columns()
+            for table in SQLModel.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(self.engine, checkfirst=True)
             try:
                 init_db_samples(self)
             except Exception as e:
@@ -40,30 +150,77 @@ class DBManager:
         except Exception as e:
             logger.info("Error while creating database tables:" + str(e))
 
+    def _add_missing_columns(self):
+        """Add the nullable columns of the models that are missing from existing tables"""
+        inspector = inspect(self.engine)
+        with self.engine.begin() as connection:
+            preparer = connection.dialect.identifier_preparer
+            for table in SQLModel.metadata.sorted_tables:
+                if not inspector.has_table(table.name):
+                    continue
+                existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing_columns or not column.nullable:
+                        continue
+                    if isinstance(column.type, Enum):
+                        column.type.create(connection, checkfirst=True)
+                    logger.info("Adding column %s to table %s", column.name, table.name)
+                    connection.execute(
+                        text(
+                            f"ALTER TABLE {preparer.quote(table.name)} ADD COLUMN {preparer.quote(column.name)} "
+                            f"{column.type.compile(dialect=connection.dialect)}"
+                        )
+                    )
+
     def upsert(self, model: SQLModel):
         """Create a new entity"""
-        # check if the model exists, update else add
+        with Session(self.engine) as session:
+            return self._upsert(session, model)
+
+    def _upsert(self, session: Session, model: SQLModel):
         status = True
         model_class = type(model)
         existing_model = None
 
-        with Session(self.engine) as session:
+        if self._supports_upsert(session):
+            # a model sent with an id updates that row, the message cannot tell if the row was missing
+            existing_model = model.id is not None
             try:
-                existing_model = session.exec(select(model_class).where(model_class.id == model.id)).first()
-                if existing_model:
-                    model.updated_at = datetime.now()
-                    for key, value in model.model_dump().items():
-                        setattr(existing_model, key, value)
-                    model = existing_model
-                    session.add(model)
-                else:
-                    session.add(model)
+                model = self._upsert_rows(session, model_class, [model])[0]
+                data = model.model_dump()
                 session.commit()
-                session.refresh(model)
             except Exception as e:
                 session.rollback()
                 logger.error("Error while upserting %s", e)
                 status = False
+                data = model.model_dump()
+            return Response(
+                message=(
+                    f"{model_class.__name__} Updated Successfully "
+                    if existing_model
+                    else f"{model_class.__name__} Created Successfully"
+                ),
+                status=status,
+                data=data,
+            )
+
+        # check if the model exists, update else add
+        try:
+            existing_model = session.exec(select(model_class).where(model_class.id == model.id)).first()
+            if existing_model:
+                model.updated_at = datetime.now()
+                for key, value in model.model_dump().items():
+                    setattr(existing_model, key, value)
+                model = existing_model
+                session.add(model)
+            else:
+                session.add(model)
+            session.commit()
+            session.refresh(model)
+        except Exception as e:
+            session.rollback()
+            logger.error("Error while upserting %s", e)
+            status = False
 
         response = Response(
             message=(
@@ -77,6 +234,89 @@ class DBManager:
 
         return response
 
+    def bulk_upsert(self, models: List[SQLModel]) -> Response:
+        """
+        Create or update many entities (e.g. imported agents, skills or messages) in one transaction.
+
+        On SQLite and Postgres each table is written with one INSERT ... ON CONFLICT DO UPDATE
+        statement per batch of models with the same columns, which updates the columns set on any
+        model of the batch and returns the stored rows.
+
+        Args:
+            models (List[SQLModel]): The entities to store, of one or more model classes.
+
+        Returns:
+            Response: The response of the operation, with the stored entities as data.
+        """
+        with Session(self.engine) as session:
+            return self._bulk_upsert(session, models)
+
+    def _bulk_upsert(self, session: Session, models: List[SQLModel]) -> Response:
+        status = True
+        status_message = f"{len(models)} entities stored successfully"
+        data = []
+        models_by_class: Dict[type, List[SQLModel]] = {}
+        for model in models:
+            models_by_class.setdefault(type(model), []).append(model)
+
+        try:
+            if self._supports_upsert(session):
+                for model_class, class_models in models_by_class.items():
+                    data.extend(model.model_dump() for model in self._upsert_rows(session, model_class, class_models))
+            else:
+                for model in models:
+                    model = session.merge(model)
+                    if model.id is not None:
+                        model.updated_at = datetime.now()
+                    session.flush()
+                    data.append(model.model_dump())
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error("Error while upserting %s", e)
+            status = False
+            status_message = f"Error while storing entities: {e}"
+            data = []
+
+        return Response(message=status_message, status=status, data=data)
+
+    def _supports_upsert(self, session: Session) -> bool:
+        dialect = session.get_bind().dialect
+        return dialect.name in upsert_dialects and dialect.insert_returning
+
+    def _upsert_rows(self, session: Session, model_class: type, models: List[SQLModel]) -> List[SQLModel]:
+        """Insert or update rows of one table with INSERT ... ON CONFLICT DO UPDATE ... RETURNING"""
+        insert = upsert_dialects[session.get_bind().dialect.name]
+        table = model_class.__table__
+        primary_keys = [column.name for column in table.primary_key.columns]
+        # only the columns the caller set are written on conflict, the rest of the stored row is kept
+        updated_columns = set().union(*(model.model_fields_set for model in models))
+        updated_columns = (updated_columns & set(table.columns.keys())) - set(primary_keys) - {"updated_at"}
+
+        # rows without a primary key are inserted with a generated one, so they are batched separately
+        batches: Dict[Tuple[str, ...], List[Dict]] = {}
+        for model in models:
+            values = {
+                key: value
+                for key, value in model.model_dump().items()
+                if key in table.columns and not (key in primary_keys and value is None)
+            }
+            batches.setdefault(tuple(sorted(values)), []).append(values)
+
+        stored_models = []
+        for columns, rows in batches.items():
+            statement = insert(model_class).values(rows)
+            update_values = {column: statement.excluded[column] for column in updated_columns if column in columns}
+            if "updated_at" in table.columns:
+                update_values["updated_at"] = datetime.now()
+            statement = statement.on_conflict_do_update(index_elements=primary_keys, set_=update_values)
+            stored_models.extend(
+                session.scalars(
+                    statement.returning(model_class), execution_options={"populate_existing": True}
+                ).all()
+            )
+        return stored_models
+
     def _model_to_dict(self, model_obj):
         return {col.name: getattr(model_obj, col.name) for col in model_obj.__table__.columns}
 
@@ -87,40 +327,98 @@ class DBManager:
         filters: dict = None,
         return_json: bool = False,
         order: str = "desc",
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
     ):
-        """List all entities"""
+        """
+        List entities, optionally one page at a time.
+
+        Pages are ordered by (created_at, id) and continue after the position encoded in the cursor,
+        so fetching a page costs the same however deep into the list it is. The response carries
+        the cursor of the next page in next_cursor, or None on the last page.
+
+        Args:
+            model_class (SQLModel): The model class of the entities.
+            session (Session): The database session to query with.
+            filters (dict): Column values the entities must match.
+            return_json (bool): Whether to return the entities as dictionaries.
+            order (str): "desc" for the newest entities first, "asc" for the oldest first.
+            limit (Optional[int]): The maximum number of entities to return.
+            cursor (Optional[str]): The next_cursor of the previous page.
+            fields (Optional[List[str]]): The columns to return, the id and created_at are always included.
+                Entities are returned as dictionaries when fields are given.
+
+        Returns:
+            Response: The response with the entities as data.
+        """
         result = []
         status = True
         status_message = ""
+        next_cursor = None
 
         try:
+            paginated = hasattr(model_class, "created_at") and (limit is not None or cursor is not None)
+            if fields:
+                invalid_fields = set(fields) - set(model_class.__table__.columns.keys())
+                if invalid_fields:
+                    raise ValueError(f"Invalid fields: {sorted(invalid_fields)}")
+                fields = list(dict.fromkeys(["id", "created_at", *fields]))
+                statement = select(*[getattr(model_class, field) for field in fields])
+            else:
+                statement = select(model_class)
             if filters:
                 conditions = [getattr(model_class, col) == value for col, value in filters.items()]
-                statement = select(model_class).where(and_(*conditions))
+                statement = statement.where(and_(*conditions))
 
-                if hasattr(model_class, "created_at") and order:
-                    if order == "desc":
-                        statement = statement.order_by(model_class.created_at.desc())
-                    else:
-                        statement = statement.order_by(model_class.created_at.asc())
-            else:
-                statement = select(model_class)
+            if hasattr(model_class, "created_at") and (filters or paginated) and order:
+                if order == "desc":
+                    statement = statement.order_by(model_class.created_at.desc(), model_class.id.desc())
+                else:
+                    statement = statement.order_by(model_class.created_at.asc(), model_class.id.asc())
+            if paginated and cursor:
+                created_at, id = decode_cursor(cursor)
+                if order == "desc":
+                    after_cursor = or_(
+                        model_class.created_at < created_at,
+                        and_(model_class.created_at == created_at, model_class.id < id),
+                    )
+                else:
+                    after_cursor = or_(
+                        model_class.created_at > created_at,
+                        and_(model_class.created_at == created_at, model_class.id > id),
+                    )
+                statement = statement.where(after_cursor)
+            if limit is not None:
+                # fetch one extra row to tell whether there is a next page
+                statement = statement.limit(limit + 1)
+
+            rows = session.exec(statement).all()
+            if limit is not None and len(rows) > limit:
+                rows = rows[:limit]
+                if paginated:
+                    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
 
-            if return_json:
-                result = [self._model_to_dict(row) for row in session.exec(statement).all()]
+            if fields:
+                result = [dict(row._mapping) for row in rows]
+            elif return_json:
+                result = [self._model_to_dict(row) for row in rows]
             else:
-                result = session.exec(statement).all()
+                result = rows
             status_message = f"{model_class.__name__} Retrieved Successfully"
         except Exception as e:
             session.rollback()
             status = False
             status_message = f"Error while fetching  {model_class.__name__}"
+            if isinstance(e, ValueError):
+                status_message = f"{status_message}: {e}"
             logger.error("Error while getting %s: %s", model_class.__name__, e)
 
         response: Response = Response(
             message=status_message,
             status=status,
             data=result,
+            next_cursor=next_cursor,
         )
         return response
 
@@ -130,52 +428,135 @@ class DBManager:
         filters: dict = None,
         return_json: bool = False,
         order: str = "desc",
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
     ):
-        """List all entities"""
+        """List all entities, see get_items for paging through them"""
 
         with Session(self.engine) as session:
-            response = self.get_items(model_class, session, filters, return_json, order)
+            response = self.get_items(model_class, session, filters, return_json, order, limit, cursor, fields)
         return response
 
     def delete(self, model_class: SQLModel, filters: dict = None):
         """Delete an entity"""
-        row = None
+        with Session(self.engine) as session:
+            return self._delete(session, model_class, filters)
+
+    def _delete(self, session: Session, model_class: SQLModel, filters: dict = None):
         status_message = ""
         status = True
+        deleted_count = 0
 
-        with Session(self.engine) as session:
-            try:
-                if filters:
-                    conditions = [getattr(model_class, col) == value for col, value in filters.items()]
-                    row = session.exec(select(model_class).where(and_(*conditions))).all()
-                else:
-                    row = session.exec(select(model_class)).all()
-                if row:
-                    for row in row:
-                        session.delete(row)
-                    session.commit()
-                    status_message = f"{model_class.__name__} Deleted Successfully"
-                else:
-                    print(f"Row with filters {filters} not found")
-                    logger.info("Row with filters %s not found", filters)
-                    status_message = "Row not found"
-            except exc.IntegrityError as e:
-                session.rollback()
-                logger.error("Integrity ... Error while deleting: %s", e)
-                status_message = f"The {model_class.__name__} is linked to another entity and cannot be deleted."
-                status = False
-            except Exception as e:
+        try:
+            conditions = [getattr(model_class, col) == value for col, value in (filters or {}).items()]
+            # delete with set based statements instead of loading every row, messages of a deleted
+            # session are removed by the database through the ON DELETE CASCADE foreign key
+            deleted_ids = select(model_class.id).where(*conditions)
+            for column in link_columns.get(model_class, []):
+                session.execute(delete(column.table).where(column.in_(deleted_ids)))
+            if model_class is Workflow:
+                session.execute(
+                    update(SessionModel).where(SessionModel.workflow_id.in_(deleted_ids)).values(workflow_id=None)
+                )
+            deleted_count = session.execute(delete(model_class).where(*conditions)).rowcount
+            if deleted_count:
+                session.commit()
+                status_message = f"{model_class.__name__} Deleted Successfully"
+            else:
                 session.rollback()
-                logger.error("Error while deleting: %s", e)
-                status_message = f"Error while deleting: {e}"
-                status = False
-            response = Response(
-                message=status_message,
-                status=status,
-                data=None,
-            )
+                print(f"Row with filters {filters} not found")
+                logger.info("Row with filters %s not found", filters)
+                status_message = "Row not found"
+        except exc.IntegrityError as e:
+            session.rollback()
+            logger.error("Integrity ... Error while deleting: %s", e)
+            status_message = f"The {model_class.__name__} is linked to another entity and cannot be deleted."
+            status = False
+            deleted_count = 0
+        except Exception as e:
+            session.rollback()
+            logger.error("Error while deleting: %s", e)
+            status_message = f"Error while deleting: {e}"
+            status = False
+            deleted_count = 0
+        response = Response(
+            message=status_message,
+            status=status,
+            data={"deleted_count": deleted_count},
+        )
         return response
 
+    def update(self, model_class: SQLModel, filters: dict, values: dict) -> Response:
+        """Update columns of the entities matching the filters, see _update"""
+        with Session(self.engine) as session:
+            return self._update(session, model_class, filters, values)
+
+    def _update(self, session: Session, model_class: SQLModel, filters: dict, values: dict) -> Response:
+        """
+        Set columns of the entities matching the filters in a single UPDATE statement, leaving their
+        other columns as they are, so concurrent changes to those are not overwritten.
+
+        Args:
+            session (Session): The database session to update with.
+            model_class (SQLModel): The model class of the entities.
+            filters (dict): The column values the entities must have, None matching NULL.
+            values (dict): The new column values.
+
+        Returns:
+            Response: The response, with the number of updated rows as data.
+        """
+        status = True
+        updated_count = 0
+        try:
+            conditions = [getattr(model_class, col) == value for col, value in (filters or {}).items()]
+            values = dict(values)
+            if "updated_at" in model_class.__table__.columns:
+                values.setdefault("updated_at", datetime.now())
+            updated_count = session.execute(update(model_class).where(*conditions).values(**values)).rowcount
+            session.commit()
+            status_message = f"{model_class.__name__} Updated Successfully" if updated_count else "Row not found"
+        except Exception as e:
+            session.rollback()
+            logger.error("Error while updating: %s", e)
+            status_message = f"Error while updating: {e}"
+            status = False
+            updated_count = 0
+        return Response(message=status_message, status=status, data={"updated_count": updated_count})
+
+    def load_agent_graph(
+        self, session: Session, agent_ids: List[int]
+    ) -> Tuple[Dict[int, Agent], Dict[int, List[int]]]:
+        """
+        Load a set of agents and every agent nested under them (e.g. groupchat members), with their
+        skills and models, in a constant number of queries regardless of nesting depth.
+
+        Args:
+            session (Session): The database session to load with.
+            agent_ids (List[int]): The identifiers of the root agents.
+
+        Returns:
+            Tuple[Dict[int, Agent], Dict[int, List[int]]]: The loaded agents by id, and the ids of the
+            agents linked to each agent.
+        """
+        if not agent_ids:
+            return {}, {}
+        # walk AgentLink with a recursive CTE
+        agent_tree = agent_tree_cte(agent_ids)
+        agent_children: Dict[int, List[int]] = {}
+        for parent_id, child_id in session.exec(
+            select(agent_tree.c.parent_id, agent_tree.c.agent_id).order_by(agent_tree.c.parent_id, agent_tree.c.agent_id)
+        ).all():
+            agent_children.setdefault(parent_id, []).append(child_id)
+
+        all_agent_ids = set(agent_ids).union(*agent_children.values())
+        agents = session.exec(
+            select(Agent)
+            .where(Agent.id.in_(all_agent_ids))
+            .options(selectinload(Agent.skills), selectinload(Agent.models))
+        ).all()
+        return {agent.id: agent for agent in agents}, agent_children
+
     def get_linked_entities(
         self,
         link_type: str,
@@ -194,7 +575,17 @@ class DBManager:
         Returns:
             List[SQLModel]: A list of linked entities.
         """
+        with Session(self.engine) as session:
+            return self._get_linked_entities(session, link_type, primary_id, return_json, agent_type)
 
+    def _get_linked_entities(
+        self,
+        session: Session,
+        link_type: str,
+        primary_id: int,
+        return_json: bool = False,
+        agent_type: Optional[str] = None,
+    ):
         linked_entities = []
 
         if link_type not in valid_link_types:
@@ -203,33 +594,37 @@ class DBManager:
         status = True
         status_message = ""
 
-        with Session(self.engine) as session:
-            try:
-                if link_type == "agent_model":
-                    # get the agent
-                    agent = self.get_items(Agent, filters={"id": primary_id}, session=session).data[0]
-                    linked_entities = agent.models
-                elif link_type == "agent_skill":
-                    agent = self.get_items(Agent, filters={"id": primary_id}, session=session).data[0]
-                    linked_entities = agent.skills
-                elif link_type == "agent_agent":
-                    agent = self.get_items(Agent, filters={"id": primary_id}, session=session).data[0]
-                    linked_entities = agent.agents
-                elif link_type == "workflow_agent":
-                    linked_entities = session.exec(
-                        select(Agent)
-                        .join(WorkflowAgentLink)
-                        .where(
-                            WorkflowAgentLink.workflow_id == primary_id,
-                            WorkflowAgentLink.agent_type == agent_type,
-                        )
-                    ).all()
-            except Exception as e:
-                logger.error("Error while getting linked entities: %s", e)
-                status_message = f"Error while getting linked entities: {e}"
-                status = False
-            if return_json:
-                linked_entities = [self._model_to_dict(row) for row in linked_entities]
+        try:
+            # select the linked entities through the link table directly instead of lazy loading them
+            if link_type == "agent_model":
+                linked_entities = session.exec(
+                    select(Model).join(AgentModelLink).where(AgentModelLink.agent_id == primary_id)
+                ).all()
+            elif link_type == "agent_skill":
+                linked_entities = session.exec(
+                    select(Skill).join(AgentSkillLink).where(AgentSkillLink.agent_id == primary_id)
+                ).all()
+            elif link_type == "agent_agent":
+                linked_entities = session.exec(
+                    select(Agent)
+                    .join(AgentLink, AgentLink.agent_id == Agent.id)
+                    .where(AgentLink.parent_id == primary_id)
+                ).all()
+            elif link_type == "workflow_agent":
+                linked_entities = session.exec(
+                    select(Agent)
+                    .join(WorkflowAgentLink)
+                    .where(
+                        WorkflowAgentLink.workflow_id == primary_id,
+                        WorkflowAgentLink.agent_type == agent_type,
+                    )
+                ).all()
+        except Exception as e:
+            logger.error("Error while getting linked entities: %s", e)
+            status_message = f"Error while getting linked entities: {e}"
+            status = False
+        if return_json:
+            linked_entities = [self._model_to_dict(row) for row in linked_entities]
 
         response = Response(
             message=status_message,
@@ -258,7 +653,17 @@ class DBManager:
         Returns:
             Response: The response of the linking operation, including success status and message.
         """
+        with Session(self.engine) as session:
+            return self._link(session, link_type, primary_id, secondary_id, agent_type)
 
+    def _link(
+        self,
+        session: Session,
+        link_type: str,
+        primary_id: int,
+        secondary_id: int,
+        agent_type: Optional[str] = None,
+    ) -> Response:
         # TBD verify that is creator of the primary entity being linked
         status = True
         status_message = ""
@@ -269,125 +674,126 @@ class DBManager:
             status = False
             status_message = f"Invalid link type: {link_type}. Valid link types are: {valid_link_types}"
         else:
-            with Session(self.engine) as session:
-                try:
-                    if link_type == "agent_model":
-                        primary_model = session.exec(select(Agent).where(Agent.id == primary_id)).first()
-                        secondary_model = session.exec(select(Model).where(Model.id == secondary_id)).first()
-                        if primary_model is None or secondary_model is None:
-                            status = False
-                            status_message = "One or both entity records do not exist."
+            try:
+                if link_type == "agent_model":
+                    primary_model = session.exec(select(Agent).where(Agent.id == primary_id)).first()
+                    secondary_model = session.exec(select(Model).where(Model.id == secondary_id)).first()
+                    if primary_model is None or secondary_model is None:
+                        status = False
+                        status_message = "One or both entity records do not exist."
+                    else:
+                        # check if the link already exists
+                        existing_link = session.exec(
+                            select(AgentModelLink).where(
+                                AgentModelLink.agent_id == primary_id,
+                                AgentModelLink.model_id == secondary_id,
+                            )
+                        ).first()
+                        if existing_link:  # link already exists
+                            return Response(
+                                message=(
+                                    f"{secondary_model.__class__.__name__} already linked "
+                                    f"to {primary_model.__class__.__name__}"
+                                ),
+                                status=False,
+                            )
                         else:
-                            # check if the link already exists
-                            existing_link = session.exec(
-                                select(AgentModelLink).where(
-                                    AgentModelLink.agent_id == primary_id,
-                                    AgentModelLink.model_id == secondary_id,
-                                )
-                            ).first()
-                            if existing_link:  # link already exists
-                                return Response(
-                                    message=(
-                                        f"{secondary_model.__class__.__name__} already linked "
-                                        f"to {primary_model.__class__.__name__}"
-                                    ),
-                                    status=False,
-                                )
-                            else:
-                                primary_model.models.append(secondary_model)
-                    elif link_type == "agent_agent":
-                        primary_model = session.exec(select(Agent).where(Agent.id == primary_id)).first()
-                        secondary_model = session.exec(select(Agent).where(Agent.id == secondary_id)).first()
-                        if primary_model is None or secondary_model is None:
-                            status = False
-                            status_message = "One or both entity records do not exist."
+                            primary_model.models.append(secondary_model)
+                elif link_type == "agent_agent":
+                    primary_model = session.exec(select(Agent).where(Agent.id == primary_id)).first()
+                    secondary_model = session.exec(select(Agent).where(Agent.id == secondary_id)).first()
+                    if primary_model is None or secondary_model is None:
+                        status = False
+                        status_message = "One or both entity records do not exist."
+                    else:
+                        # check if the link already exists
+                        existing_link = session.exec(
+                            select(AgentLink).where(
+                                AgentLink.parent_id == primary_id,
+                                AgentLink.agent_id == secondary_id,
+                            )
+                        ).first()
+                        if existing_link:
+                            return Response(
+                                message=(
+                                    f"{secondary_model.__class__.__name__} already linked "
+                                    f"to {primary_model.__class__.__name__}"
+                                ),
+                                status=False,
+                            )
                         else:
-                            # check if the link already exists
-                            existing_link = session.exec(
-                                select(AgentLink).where(
-                                    AgentLink.parent_id == primary_id,
-                                    AgentLink.agent_id == secondary_id,
-                                )
-                            ).first()
-                            if existing_link:
-                                return Response(
-                                    message=(
-                                        f"{secondary_model.__class__.__name__} already linked "
-                                        f"to {primary_model.__class__.__name__}"
-                                    ),
-                                    status=False,
-                                )
-                            else:
-                                primary_model.agents.append(secondary_model)
-
-                    elif link_type == "agent_skill":
-                        primary_model = session.exec(select(Agent).where(Agent.id == primary_id)).first()
-                        secondary_model = session.exec(select(Skill).where(Skill.id == secondary_id)).first()
-                        if primary_model is None or secondary_model is None:
-                            status = False
-                            status_message = "One or both entity records do not exist."
+                            primary_model.agents.append(secondary_model)
+
+                elif link_type == "agent_skill":
+                    primary_model = session.exec(select(Agent).where(Agent.id == primary_id)).first()
+                    secondary_model = session.exec(select(Skill).where(Skill.id == secondary_id)).first()
+                    if primary_model is None or secondary_model is None:
+                        status = False
+                        status_message = "One or both entity records do not exist."
+                    else:
+                        # check if the link already exists
+                        existing_link = session.exec(
+                            select(AgentSkillLink).where(
+                                AgentSkillLink.agent_id == primary_id,
+                                AgentSkillLink.skill_id == secondary_id,
+                            )
+                        ).first()
+                        if existing_link:
+                            return Response(
+                                message=(
+                                    f"{secondary_model.__class__.__name__} already linked "
+                                    f"to {primary_model.__class__.__name__}"
+                                ),
+                                status=False,
+                            )
                         else:
-                            # check if the link already exists
-                            existing_link = session.exec(
-                                select(AgentSkillLink).where(
-                                    AgentSkillLink.agent_id == primary_id,
-                                    AgentSkillLink.skill_id == secondary_id,
-                                )
-                            ).first()
-                            if existing_link:
-                                return Response(
-                                    message=(
-                                        f"{secondary_model.__class__.__name__} already linked "
-                                        f"to {primary_model.__class__.__name__}"
-                                    ),
-                                    status=False,
-                                )
-                            else:
-                                primary_model.skills.append(secondary_model)
-                    elif link_type == "workflow_agent":
-                        primary_model = session.exec(select(Workflow).where(Workflow.id == primary_id)).first()
-                        secondary_model = session.exec(select(Agent).where(Agent.id == secondary_id)).first()
-                        if primary_model is None or secondary_model is None:
-                            status = False
-                            status_message = "One or both entity records do not exist."
+                            primary_model.skills.append(secondary_model)
+                elif link_type == "workflow_agent":
+                    primary_model = session.exec(select(Workflow).where(Workflow.id == primary_id)).first()
+                    secondary_model = session.exec(select(Agent).where(Agent.id == secondary_id)).first()
+                    if primary_model is None or secondary_model is None:
+                        status = False
+                        status_message = "One or both entity records do not exist."
+                    else:
+                        # check if the link already exists
+                        existing_link = session.exec(
+                            select(WorkflowAgentLink).where(
+                                WorkflowAgentLink.workflow_id == primary_id,
+                                WorkflowAgentLink.agent_id == secondary_id,
+                                WorkflowAgentLink.agent_type == agent_type,
+                            )
+                        ).first()
+                        if existing_link:
+                            return Response(
+                                message=(
+                                    f"{secondary_model.__class__.__name__} already linked "
+                                    f"to {primary_model.__class__.__name__}"
+                                ),
+                                status=False,
+                            )
                         else:
-                            # check if the link already exists
-                            existing_link = session.exec(
-                                select(WorkflowAgentLink).where(
-                                    WorkflowAgentLink.workflow_id == primary_id,
-                                    WorkflowAgentLink.agent_id == secondary_id,
-                                    WorkflowAgentLink.agent_type == agent_type,
-                                )
-                            ).first()
-                            if existing_link:
-                                return Response(
-                                    message=(
-                                        f"{secondary_model.__class__.__name__} already linked "
-                                        f"to {primary_model.__class__.__name__}"
-                                    ),
-                                    status=False,
-                                )
-                            else:
-                                # primary_model.agents.append(secondary_model)
-                                workflow_agent_link = WorkflowAgentLink(
-                                    workflow_id=primary_id,
-                                    agent_id=secondary_id,
-                                    agent_type=agent_type,
-                                )
-                                session.add(workflow_agent_link)
-                    # add and commit the link
-                    session.add(primary_model)
-                    session.commit()
-                    status_message = (
-                        f"{secondary_model.__class__.__name__} successfully linked "
-                        f"to {primary_model.__class__.__name__}"
-                    )
+                            # primary_model.agents.append(secondary_model)
+                            workflow_agent_link = WorkflowAgentLink(
+                                workflow_id=primary_id,
+                                agent_id=secondary_id,
+                                agent_type=agent_type,
+                            )
+                            session.add(workflow_agent_link)
+                # add and commit the link, marking the primary entity as modified
+                if status:
+                    primary_model.updated_at = datetime.now()
+                session.add(primary_model)
+                session.commit()
+                status_message = (
+                    f"{secondary_model.__class__.__name__} successfully linked "
+                    f"to {primary_model.__class__.__name__}"
+                )
 
-                except Exception as e:
-                    session.rollback()
-                    logger.error("Error while linking: %s", e)
-                    status = False
-                    status_message = f"Error while linking due to an exception: {e}"
+            except Exception as e:
+                session.rollback()
+                logger.error("Error while linking: %s", e)
+                status = False
+                status_message = f"Error while linking due to an exception: {e}"
 
         response = Response(
             message=status_message,
@@ -415,6 +821,17 @@ class DBManager:
         Returns:
             Response: The response of the unlinking operation, including success status and message.
         """
+        with Session(self.engine) as session:
+            return self._unlink(session, link_type, primary_id, secondary_id, agent_type)
+
+    def _unlink(
+        self,
+        session: Session,
+        link_type: str,
+        primary_id: int,
+        secondary_id: int,
+        agent_type: Optional[str] = None,
+    ) -> Response:
         status = True
         status_message = ""
 
@@ -423,50 +840,355 @@ class DBManager:
             status_message = f"Invalid link type: {link_type}. Valid link types are: {valid_link_types}"
             return Response(message=status_message, status=status)
 
+        try:
+            if link_type == "agent_model":
+                existing_link = session.exec(
+                    select(AgentModelLink).where(
+                        AgentModelLink.agent_id == primary_id,
+                        AgentModelLink.model_id == secondary_id,
+                    )
+                ).first()
+            elif link_type == "agent_skill":
+                existing_link = session.exec(
+                    select(AgentSkillLink).where(
+                        AgentSkillLink.agent_id == primary_id,
+                        AgentSkillLink.skill_id == secondary_id,
+                    )
+                ).first()
+            elif link_type == "agent_agent":
+                existing_link = session.exec(
+                    select(AgentLink).where(
+                        AgentLink.parent_id == primary_id,
+                        AgentLink.agent_id == secondary_id,
+                    )
+                ).first()
+            elif link_type == "workflow_agent":
+                existing_link = session.exec(
+                    select(WorkflowAgentLink).where(
+                        WorkflowAgentLink.workflow_id == primary_id,
+                        WorkflowAgentLink.agent_id == secondary_id,
+                        WorkflowAgentLink.agent_type == agent_type,
+                    )
+                ).first()
+
+            if existing_link:
+                session.delete(existing_link)
+                primary_model = session.get(Workflow if link_type == "workflow_agent" else Agent, primary_id)
+                if primary_model is not None:
+                    primary_model.updated_at = datetime.now()
+                    session.add(primary_model)
+                session.commit()
+                status_message = "Link removed successfully."
+            else:
+                status = False
+                status_message = "Link does not exist."
+
+        except Exception as e:
+            session.rollback()
+            logger.error("Error while unlinking: %s", e)
+            status = False
+            status_message = f"Error while unlinking due to an exception: {e}"
+
+        return Response(message=status_message, status=status)
+
+    def link_many(
+        self,
+        link_type: str,
+        primary_id: int,
+        secondary_ids: List[int],
+        agent_type: Optional[str] = None,
+    ) -> Response:
+        """
+        Link many entities to a primary entity in a single transaction.
+
+        The primary entity, the secondary entities and the existing links are each checked with one
+        query and the new links are inserted together. Nothing is linked if any entity is missing;
+        entities that are already linked are skipped.
+
+        Args:
+            link_type (str): The type of link to create, e.g., "agent_skill".
+            primary_id (int): The identifier for the primary model.
+            secondary_ids (List[int]): The identifiers for the secondary models.
+            agent_type (Optional[str]): The type of agent for "workflow_agent" links, e.g., "sender" or receiver.
+
+        Returns:
+            Response: The response of the linking operation, with the linked, already linked and missing
+            identifiers as data.
+        """
         with Session(self.engine) as session:
-            try:
-                if link_type == "agent_model":
-                    existing_link = session.exec(
-                        select(AgentModelLink).where(
-                            AgentModelLink.agent_id == primary_id,
-                            AgentModelLink.model_id == secondary_id,
-                        )
-                    ).first()
-                elif link_type == "agent_skill":
-                    existing_link = session.exec(
-                        select(AgentSkillLink).where(
-                            AgentSkillLink.agent_id == primary_id,
-                            AgentSkillLink.skill_id == secondary_id,
-                        )
-                    ).first()
-                elif link_type == "agent_agent":
-                    existing_link = session.exec(
-                        select(AgentLink).where(
-                            AgentLink.parent_id == primary_id,
-                            AgentLink.agent_id == secondary_id,
-                        )
-                    ).first()
-                elif link_type == "workflow_agent":
-                    existing_link = session.exec(
-                        select(WorkflowAgentLink).where(
-                            WorkflowAgentLink.workflow_id == primary_id,
-                            WorkflowAgentLink.agent_id == secondary_id,
-                            WorkflowAgentLink.agent_type == agent_type,
-                        )
-                    ).first()
+            return self._link_many(session, link_type, primary_id, secondary_ids, agent_type)
 
-                if existing_link:
-                    session.delete(existing_link)
-                    session.commit()
-                    status_message = "Link removed successfully."
-                else:
-                    status = False
-                    status_message = "Link does not exist."
+    def _link_many(
+        self,
+        session: Session,
+        link_type: str,
+        primary_id: int,
+        secondary_ids: List[int],
+        agent_type: Optional[str] = None,
+    ) -> Response:
+        if link_type not in valid_link_types:
+            return Response(
+                message=f"Invalid link type: {link_type}. Valid link types are: {valid_link_types}",
+                status=False,
+            )
+        if link_type == "workflow_agent" and agent_type is None:
+            return Response(message="An agent_type is required to link agents to a workflow.", status=False)
 
-            except Exception as e:
+        primary_class, secondary_class, link_class, primary_column, secondary_column = link_models[link_type]
+        secondary_ids = list(dict.fromkeys(secondary_ids))
+        data = {"linked": [], "already_linked": [], "missing": []}
+        status = True
+        status_message = ""
+
+        try:
+            primary_model = session.get(primary_class, primary_id)
+            found_ids = set(session.exec(select(secondary_class.id).where(secondary_class.id.in_(secondary_ids))).all())
+            data["missing"] = [secondary_id for secondary_id in secondary_ids if secondary_id not in found_ids]
+            if primary_model is None or data["missing"]:
+                return Response(message="One or more entity records do not exist.", status=False, data=data)
+
+            existing_links = select(getattr(link_class, secondary_column)).where(
+                getattr(link_class, primary_column) == primary_id,
+                getattr(link_class, secondary_column).in_(secondary_ids),
+            )
+            if link_class is WorkflowAgentLink:
+                existing_links = existing_links.where(WorkflowAgentLink.agent_type == agent_type)
+            linked_ids = set(session.exec(existing_links).all())
+            for secondary_id in secondary_ids:
+                data["already_linked" if secondary_id in linked_ids else "linked"].append(secondary_id)
+
+            if data["linked"]:
+                link_values = {"agent_type": agent_type} if link_class is WorkflowAgentLink else {}
+                session.add_all(
+                    [
+                        link_class(**{primary_column: primary_id, secondary_column: secondary_id}, **link_values)
+                        for secondary_id in data["linked"]
+                    ]
+                )
+                primary_model.updated_at = datetime.now()
+                session.add(primary_model)
+                session.commit()
+            status_message = (
+                f"{len(data['linked'])} {secondary_class.__name__} successfully linked to {primary_class.__name__}"
+            )
+        except Exception as e:
+            session.rollback()
+            logger.error("Error while linking: %s", e)
+            status = False
+            status_message = f"Error while linking due to an exception: {e}"
+            data["linked"] = []
+
+        return Response(message=status_message, status=status, data=data)
+
+    def unlink_many(
+        self,
+        link_type: str,
+        primary_id: int,
+        secondary_ids: List[int],
+        agent_type: Optional[str] = None,
+    ) -> Response:
+        """
+        Unlink many entities from a primary entity with a single DELETE statement.
+
+        Args:
+            link_type (str): The type of link to remove, e.g., "agent_skill".
+            primary_id (int): The identifier for the primary model.
+            secondary_ids (List[int]): The identifiers for the secondary models.
+            agent_type (Optional[str]): The type of agent for "workflow_agent" links, e.g., "sender" or receiver.
+
+        Returns:
+            Response: The response of the unlinking operation, with the number of removed links as data.
+        """
+        with Session(self.engine) as session:
+            return self._unlink_many(session, link_type, primary_id, secondary_ids, agent_type)
+
+    def _unlink_many(
+        self,
+        session: Session,
+        link_type: str,
+        primary_id: int,
+        secondary_ids: List[int],
+        agent_type: Optional[str] = None,
+    ) -> Response:
+        if link_type not in valid_link_types:
+            return Response(
+                message=f"Invalid link type: {link_type}. Valid link types are: {valid_link_types}",
+                status=False,
+            )
+
+        primary_class, _, link_class, primary_column, secondary_column = link_models[link_type]
+        status = True
+        unlinked_count = 0
+
+        try:
+            statement = delete(link_class).where(
+                getattr(link_class, primary_column) == primary_id,
+                getattr(link_class, secondary_column).in_(secondary_ids),
+            )
+            if link_class is WorkflowAgentLink:
+                statement = statement.where(WorkflowAgentLink.agent_type == agent_type)
+            unlinked_count = session.execute(statement).rowcount
+            if unlinked_count:
+                session.execute(
+                    update(primary_class).where(primary_class.id == primary_id).values(updated_at=datetime.now())
+                )
+                session.commit()
+                status_message = f"{unlinked_count} links removed successfully."
+            else:
                 session.rollback()
-                logger.error("Error while unlinking: %s", e)
                 status = False
-                status_message = f"Error while unlinking due to an exception: {e}"
+                status_message = "Link does not exist."
+        except Exception as e:
+            session.rollback()
+            logger.error("Error while unlinking: %s", e)
+            status = False
+            status_message = f"Error while unlinking due to an exception: {e}"
+            unlinked_count = 0
 
-        return Response(message=status_message, status=status)
+        return Response(message=status_message, status=status, data={"unlinked_count": unlinked_count})
+
+
+# async drivers used for the sync drivers the application is configured with
+async_drivers = {"sqlite": "aiosqlite", "postgresql": "psycopg"}
+
+
+def async_engine_uri(engine_uri: str) -> URL:
+    """
+    Get the URI of the async driver for a database URI, e.g. sqlite+aiosqlite for sqlite.
+
+    Args:
+        engine_uri (str): The database URI used by the sync engine.
+
+    Returns:
+        URL: The database URI for the async engine.
+    """
+    url = make_url(engine_uri)
+    backend = url.get_backend_name()
+    if backend not in async_drivers:
+        raise ValueError(f"No async driver for database {backend}. Supported databases are: {list(async_drivers)}")
+    return url.set(drivername=f"{backend}+{async_drivers[backend]}")
+
+
+class AsyncDBManager:
+    """
+    An async counterpart of DBManager for the API routes, so database queries do not block the
+    event loop serving WebSocket traffic. The queries themselves are shared with the DBManager it
+    wraps and run on an AsyncEngine with the same pool settings; the DBManager stays in use for the
+    CLI, migrations and workflow runs. Note that an in-memory SQLite database is not shared
+    between the two engines.
+    """
+
+    def __init__(self, dbmanager: DBManager):
+        """
+        Create the async engine for the database of a DBManager.
+
+        Args:
+            dbmanager (DBManager): The sync database manager whose database and queries are used.
+        """
+        self.dbmanager = dbmanager
+        self.engine = create_async_engine(async_engine_uri(dbmanager.engine_uri), **dbmanager.engine_args)
+        if dbmanager.is_sqlite:
+            event.listen(self.engine.sync_engine, "connect", dbmanager._configure_sqlite_connection)
+
+    async def upsert(self, model: SQLModel) -> Response:
+        """Create a new entity"""
+        async with AsyncSession(self.engine) as session:
+            return await session.run_sync(self.dbmanager._upsert, model)
+
+    async def bulk_upsert(self, models: List[SQLModel]) -> Response:
+        """Create or update many entities in one transaction, see DBManager.bulk_upsert"""
+        async with AsyncSession(self.engine) as session:
+            return await session.run_sync(self.dbmanager._bulk_upsert, models)
+
+    async def get(
+        self,
+        model_class: SQLModel,
+        filters: dict = None,
+        return_json: bool = False,
+        order: str = "desc",
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Response:
+        """List all entities, see DBManager.get_items for paging through them"""
+        async with AsyncSession(self.engine) as session:
+            return await session.run_sync(
+                lambda sync_session: self.dbmanager.get_items(
+                    model_class, sync_session, filters, return_json, order, limit, cursor, fields
+                )
+            )
+
+    async def delete(self, model_class: SQLModel, filters: dict = None) -> Response:
+        """Delete an entity"""
+        async with AsyncSession(self.engine) as session:
+            return await session.run_sync(self.dbmanager._delete, model_class, filters)
+
+    async def update(self, model_class: SQLModel, filters: dict, values: dict) -> Response:
+        """Update columns of the entities matching the filters, see DBManager.update"""
+        async with AsyncSession(self.engine) as session:
+            return await session.run_sync(self.dbmanager._update, model_class, filters, values)
+
+    async def get_linked_entities(
+        self,
+        link_type: str,
+        primary_id: int,
+        return_json: bool = False,
+        agent_type: Optional[str] = None,
+    ) -> Response:
+        """Get all entities linked to the primary entity, see DBManager.get_linked_entities"""
+        async with AsyncSession(self.engine) as session:
+            return await session.run_sync(
+                self.dbmanager._get_linked_entities, link_type, primary_id, return_json, agent_type
+            )
+
+    async def link(
+        self,
+        link_type: str,
+        primary_id: int,
+        secondary_id: int,
+        agent_type: Optional[str] = None,
+    ) -> Response:
+        """Link two entities together, see DBManager.link"""
+        async with AsyncSession(self.engine) as session:
+            return await session.run_sync(self.dbmanager._link, link_type, primary_id, secondary_id, agent_type)
+
+    async def unlink(
+        self,
+        link_type: str,
+        primary_id: int,
+        secondary_id: int,
+        agent_type: Optional[str] = None,
+    ) -> Response:
+        """Unlink two entities, see DBManager.unlink"""
+        async with AsyncSession(self.engine) as session:
+            return await session.run_sync(self.dbmanager._unlink, link_type, primary_id, secondary_id, agent_type)
+
+    async def link_many(
+        self,
+        link_type: str,
+        primary_id: int,
+        secondary_ids: List[int],
+        agent_type: Optional[str] = None,
+    ) -> Response:
+        """Link many entities to a primary entity, see DBManager.link_many"""
+        async with AsyncSession(self.engine) as session:
+            return await session.run_sync(
+                self.dbmanager._link_many, link_type, primary_id, secondary_ids, agent_type
+            )
+
+    async def unlink_many(
+        self,
+        link_type: str,
+        primary_id: int,
+        secondary_ids: List[int],
+        agent_type: Optional[str] = None,
+    ) -> Response:
+        """Unlink many entities from a primary entity, see DBManager.unlink_many"""
+        async with AsyncSession(self.engine) as session:
+            return await session.run_sync(
+                self.dbmanager._unlink_many, link_type, primary_id, secondary_ids, agent_type
+            )
+
+    async def dispose(self) -> None:
+        """Close the connections of the async engine"""
+        await self.engine.dispose()
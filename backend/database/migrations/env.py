@@ -6,12 +6,14 @@ from sqlalchemy import engine_from_config, pool
 from sqlmodel import SQLModel
 
 from autogenstudio.datamodel import *
-from autogenstudio.utils import get_db_uri
+from autogenstudio.utils import get_app_root, get_db_uri
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option("sqlalchemy.url", get_db_uri())
+# run_migration sets the database URI, the alembic command line migrates the application database
+if config.get_main_option("sqlalchemy.url", "driver://").startswith("driver://"):
+    config.set_main_option("sqlalchemy.url", get_db_uri(app_root=get_app_root()))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
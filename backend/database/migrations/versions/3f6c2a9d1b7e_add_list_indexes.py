@@ -0,0 +1,38 @@
+"""add indexes for listing entities by user
+
+Revision ID: 3f6c2a9d1b7e
+Revises:
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f6c2a9d1b7e"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+indexes = [
+    ("ix_message_user_id_session_id_created_at", "message", ["user_id", "session_id", "created_at"]),
+    ("ix_session_user_id_created_at", "session", ["user_id", "created_at"]),
+    ("ix_skill_user_id_created_at", "skill", ["user_id", "created_at"]),
+    ("ix_model_user_id_created_at", "model", ["user_id", "created_at"]),
+    ("ix_agent_user_id_created_at", "agent", ["user_id", "created_at"]),
+    ("ix_workflow_user_id_created_at", "workflow", ["user_id", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in indexes:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in indexes:
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,46 @@
+"""add workflow history strategy and session summary
+
+Revision ID: 8b4e1d7c2f90
+Revises: 3f6c2a9d1b7e
+Create Date: 2026-10-17 21:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8b4e1d7c2f90"
+down_revision: Union[str, None] = "3f6c2a9d1b7e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+history_strategy = sa.Enum("all", "last_n", "token_budget", "summary", name="historystrategy")
+columns = [
+    ("workflow", sa.Column("history_strategy", history_strategy, nullable=True)),
+    ("workflow", sa.Column("history_max_messages", sa.Integer(), nullable=True)),
+    ("workflow", sa.Column("history_max_tokens", sa.Integer(), nullable=True)),
+    ("session", sa.Column("summary", sqlmodel.sql.sqltypes.AutoString(), nullable=True)),
+]
+
+
+def has_column(table: str, column: str) -> bool:
+    # tables created by create_all already have the columns
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    history_strategy.create(op.get_bind(), checkfirst=True)
+    for table, column in columns:
+        if not has_column(table, column.name):
+            op.add_column(table, column)
+
+
+def downgrade() -> None:
+    for table, column in reversed(columns):
+        if has_column(table, column.name):
+            op.drop_column(table, column.name)
+    history_strategy.drop(op.get_bind(), checkfirst=True)
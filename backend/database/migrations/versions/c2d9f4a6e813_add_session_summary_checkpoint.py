@@ -0,0 +1,34 @@
+"""add session summary checkpoint
+
+Revision ID: c2d9f4a6e813
+Revises: 8b4e1d7c2f90
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c2d9f4a6e813"
+down_revision: Union[str, None] = "8b4e1d7c2f90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def has_column(table: str, column: str) -> bool:
+    # tables created by create_all already have the columns
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    if not has_column("session", "summary_message_id"):
+        op.add_column("session", sa.Column("summary_message_id", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    if has_column("session", "summary_message_id"):
+        op.drop_column("session", "summary_message_id")
@@ -1,22 +1,29 @@
 # from .util import get_app_root
+import copy
 import os
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, Optional, Tuple
 
 from alembic import command, util
 from alembic.config import Config
 from loguru import logger
 
 # from ..utils.db_utils import get_db_uri
-from sqlmodel import Session, create_engine, text
+from sqlalchemy import CTE, literal, null, union, union_all
+from sqlmodel import Session, create_engine, func, select, text
 
 from autogen.agentchat import AssistantAgent
 
 from ..datamodel import (
     Agent,
     AgentConfig,
+    AgentLink,
+    AgentModelLink,
+    AgentSkillLink,
     AgentType,
     CodeExecutionConfigTypes,
     Model,
@@ -26,12 +33,105 @@ from ..datamodel import (
 )
 
 
+def agent_tree_cte(parent_ids: Any) -> CTE:
+    """
+    Builds a recursive CTE of the (parent_id, agent_id) links of every agent nested under a set of
+    agents (e.g. groupchat members), however deep.
+
+    :param parent_ids: The identifiers of the root agents, as a list or a select of them.
+    :return: The CTE, with parent_id and agent_id columns.
+    """
+    # UNION (not UNION ALL) terminates on cyclic links
+    agent_tree = select(AgentLink.parent_id, AgentLink.agent_id).where(AgentLink.parent_id.in_(parent_ids))
+    agent_tree = agent_tree.cte("agent_tree", recursive=True)
+    return agent_tree.union(
+        select(AgentLink.parent_id, AgentLink.agent_id).join(agent_tree, AgentLink.parent_id == agent_tree.c.agent_id)
+    )
+
+
+class WorkflowSpecCache:
+    """
+    Caches the workflow specs built by `workflow_from_id`. Each entry is tagged with the version
+    of the agent graph of its workflow, a fingerprint of the row counts and latest `updated_at` of
+    the workflow, its links and the agents, skills and models reachable from it. The fingerprint
+    is read in a single query, so changes made by other processes are detected, and edits to
+    entities outside a workflow leave its spec cached.
+    """
+
+    def __init__(self, max_size: int = 256) -> None:
+        """
+        Initializes an empty cache.
+
+        :param max_size: The maximum number of workflow specs kept, least recently used first out.
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, Tuple[Tuple, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def graph_version(self, session: Session, workflow_id: int) -> Tuple:
+        """
+        Reads the current version fingerprint of the agent graph of a workflow.
+
+        :param session: The database session to query with.
+        :param workflow_id: The identifier of the workflow.
+        :return: A tuple that changes whenever the workflow or a link, agent, skill or model of it changes.
+        """
+        root_ids = select(WorkflowAgentLink.agent_id).where(WorkflowAgentLink.workflow_id == workflow_id)
+        agent_tree = agent_tree_cte(root_ids)
+        agent_ids = union(root_ids, select(agent_tree.c.agent_id)).cte("workflow_agents")
+        no_timestamp = null().label("updated_at")
+        rows = union_all(
+            select(literal("workflow").label("kind"), Workflow.updated_at).where(Workflow.id == workflow_id),
+            select(literal("workflow_agent"), no_timestamp).where(WorkflowAgentLink.workflow_id == workflow_id),
+            select(literal("agent_agent"), no_timestamp).select_from(agent_tree),
+            select(literal("agent"), Agent.updated_at).where(Agent.id.in_(select(agent_ids))),
+            select(literal("skill"), Skill.updated_at)
+            .join(AgentSkillLink, AgentSkillLink.skill_id == Skill.id)
+            .where(AgentSkillLink.agent_id.in_(select(agent_ids))),
+            select(literal("model"), Model.updated_at)
+            .join(AgentModelLink, AgentModelLink.model_id == Model.id)
+            .where(AgentModelLink.agent_id.in_(select(agent_ids))),
+        ).subquery()
+        return tuple(
+            tuple(row)
+            for row in session.exec(
+                select(rows.c.kind, func.count(), func.max(rows.c.updated_at)).group_by(rows.c.kind).order_by(rows.c.kind)
+            ).all()
+        )
+
+    def get(self, workflow_id: int, version: Tuple) -> Optional[Dict]:
+        """
+        Returns a copy of the cached spec of a workflow if it was built from the given graph version.
+        """
+        with self._lock:
+            entry = self._entries.get(workflow_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(workflow_id)
+            spec = entry[1]
+        return copy.deepcopy(spec)
+
+    def set(self, workflow_id: int, version: Tuple, spec: Dict) -> None:
+        """
+        Stores a copy of the spec of a workflow built from the given graph version.
+        """
+        spec = copy.deepcopy(spec)
+        with self._lock:
+            self._entries[workflow_id] = (version, spec)
+            self._entries.move_to_end(workflow_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
 def workflow_from_id(workflow_id: int, dbmanager: Any):
-    workflow = dbmanager.get(Workflow, filters={"id": workflow_id}).data
-    if not workflow or len(workflow) == 0:
-        raise ValueError("The specified workflow does not exist.")
-    workflow = workflow[0].model_dump(mode="json")
-    workflow_agent_links = dbmanager.get(WorkflowAgentLink, filters={"workflow_id": workflow_id}).data
+    cache: Optional[WorkflowSpecCache] = getattr(dbmanager, "workflow_cache", None)
+    version = None
+    if cache is not None:
+        with Session(dbmanager.engine) as session:
+            version = cache.graph_version(session, workflow_id)
+        workflow = cache.get(workflow_id, version)
+        if workflow is not None:
+            return workflow
 
     def dump_agent(agent: Agent):
         exclude = []
@@ -46,9 +146,19 @@ def workflow_from_id(workflow_id: int, dbmanager: Any):
             ]
         return agent.model_dump(warnings=False, mode="json", exclude=exclude)
 
-    def get_agent(agent_id):
-        with Session(dbmanager.engine) as session:
-            agent: Agent = dbmanager.get_items(Agent, filters={"id": agent_id}, session=session).data[0]
+    with Session(dbmanager.engine) as session:
+        workflow = session.get(Workflow, workflow_id)
+        if workflow is None:
+            raise ValueError("The specified workflow does not exist.")
+        workflow = workflow.model_dump(mode="json")
+        workflow_agent_links = session.exec(
+            select(WorkflowAgentLink).where(WorkflowAgentLink.workflow_id == workflow_id)
+        ).all()
+        # load every agent reachable from the workflow, with skills and models, in a fixed number of queries
+        agents, agent_children = dbmanager.load_agent_graph(session, [link.agent_id for link in workflow_agent_links])
+
+        def get_agent(agent_id, ancestors=()):
+            agent: Agent = agents[agent_id]
             agent_dict = dump_agent(agent)
             agent_dict["skills"] = [Skill.model_validate(skill.model_dump(mode="json")) for skill in agent.skills]
             model_exclude = [
@@ -68,12 +178,18 @@ def workflow_from_id(workflow_id: int, dbmanager: Any):
                 if llm_config:
                     llm_config["config_list"] = models
                 agent_dict["config"]["llm_config"] = llm_config
-            agent_dict["agents"] = [get_agent(agent.id) for agent in agent.agents]
+            ancestors = ancestors + (agent_id,)
+            agent_dict["agents"] = [
+                get_agent(child_id, ancestors) for child_id in agent_children.get(agent_id, []) if child_id not in ancestors
+            ]
             return agent_dict
 
-    for link in workflow_agent_links:
-        agent_dict = get_agent(link.agent_id)
-        workflow[str(link.agent_type.value)] = agent_dict
+        for link in workflow_agent_links:
+            agent_dict = get_agent(link.agent_id)
+            workflow[str(link.agent_type.value)] = agent_dict
+
+    if cache is not None:
+        cache.set(workflow_id, version, workflow)
     return workflow
 
 
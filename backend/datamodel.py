@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Callable, Dict, List, Literal, Optional, Union
 
-from sqlalchemy import ForeignKey, Integer, orm
+from sqlalchemy import ForeignKey, Index, Integer, orm
 from sqlmodel import (
     JSON,
     Column,
@@ -21,7 +21,10 @@ SQLModel.model_config["protected_namespaces"] = ()
 
 
 class Message(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_message_user_id_session_id_created_at", "user_id", "session_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         default_factory=datetime.now,
@@ -42,7 +45,10 @@ class Message(SQLModel, table=True):
 
 
 class Session(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_session_user_id_created_at", "user_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         default_factory=datetime.now,
@@ -56,6 +62,10 @@ class Session(SQLModel, table=True):
     workflow_id: Optional[int] = Field(default=None, foreign_key="workflow.id")
     name: Optional[str] = None
     description: Optional[str] = None
+    # rolling summary of the messages that fell out of the history window, see HistoryStrategy
+    summary: Optional[str] = None
+    # the id of the newest message included in the summary
+    summary_message_id: Optional[int] = None
 
 
 class AgentSkillLink(SQLModel, table=True):
@@ -71,7 +81,10 @@ class AgentModelLink(SQLModel, table=True):
 
 
 class Skill(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_skill_user_id_created_at", "user_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         default_factory=datetime.now,
@@ -108,7 +121,10 @@ class ModelTypes(str, Enum):
 
 
 class Model(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_model_user_id_created_at", "user_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         default_factory=datetime.now,
@@ -130,10 +146,17 @@ class Model(SQLModel, table=True):
 
 class CodeExecutionConfigTypes(str, Enum):
     local = "local"
+    # a persistent Python process per session that keeps imports and variables between code blocks
+    kernel = "kernel"
     docker = "docker"
     none = "none"
 
 
+class SkillsPromptMode(str, Enum):
+    full = "full"  # the source code of the skills
+    signatures = "signatures"  # the signatures and docstrings of the skills' functions and classes
+
+
 class AgentConfig(SQLModel, table=False):
     name: Optional[str] = None
     human_input_mode: str = "NEVER"
@@ -146,6 +169,7 @@ class AgentConfig(SQLModel, table=False):
     default_auto_reply: Optional[str] = ""
     description: Optional[str] = None
     llm_config: Optional[Union[LLMConfig, bool]] = Field(default=False, sa_column=Column(JSON))
+    skills_prompt_mode: Optional[SkillsPromptMode] = SkillsPromptMode.full
 
     admin_name: Optional[str] = "Admin"
     messages: Optional[List[Dict]] = Field(default_factory=list)
@@ -183,7 +207,10 @@ class AgentLink(SQLModel, table=True):
 
 
 class Agent(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_agent_user_id_created_at", "user_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         default_factory=datetime.now,
@@ -228,8 +255,18 @@ class WorkFlowSummaryMethod(str, Enum):
     llm = "llm"
 
 
+class HistoryStrategy(str, Enum):
+    all = "all"  # the whole session history
+    last_n = "last_n"  # the last history_max_messages messages
+    token_budget = "token_budget"  # the most recent messages that fit in history_max_tokens
+    summary = "summary"  # the last history_max_messages messages and a summary of the earlier ones
+
+
 class Workflow(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_workflow_user_id_created_at", "user_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         default_factory=datetime.now,
@@ -248,12 +285,19 @@ class Workflow(SQLModel, table=True):
         default=WorkFlowSummaryMethod.last,
         sa_column=Column(SqlEnum(WorkFlowSummaryMethod)),
     )
+    history_strategy: Optional[HistoryStrategy] = Field(
+        default=HistoryStrategy.all,
+        sa_column=Column(SqlEnum(HistoryStrategy)),
+    )
+    history_max_messages: Optional[int] = 20
+    history_max_tokens: Optional[int] = 4000
 
 
 class Response(SQLModel):
     message: str
     status: bool
     data: Optional[Any] = None
+    next_cursor: Optional[str] = None
 
 
 class SocketMessage(SQLModel, table=False):
@@ -0,0 +1,314 @@
+import ctypes
+import ctypes.util
+import errno
+import fnmatch
+import os
+import re
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .utils import get_file_details
+
+# files and directories left out of the listing, directories matching these are not looked into
+default_ignore_patterns = [
+    "__pycache__",
+    "*.pyc",
+    "*.cache",
+    "__init__.py",
+    ".git",
+    ".venv",
+    "venv",
+    "site-packages",
+    "node_modules",
+]
+
+
+class FileTracker:
+    """
+    Records the files created or modified in a work dir while a workflow runs, so they can be
+    listed with the response without scanning the whole work dir afterwards.
+    """
+
+    def __init__(self, directory: str, ignore_patterns: Optional[List[str]] = None, max_files: int = 500) -> None:
+        """
+        Initializes the tracker.
+
+        :param directory: The directory to track.
+        :param ignore_patterns: Glob patterns of file and directory names to ignore, or of paths relative to the directory when they contain a "/".
+        :param max_files: The maximum number of files listed.
+        """
+        self.directory = os.path.abspath(directory)
+        self.ignore_patterns = default_ignore_patterns if ignore_patterns is None else ignore_patterns
+        self.max_files = max_files
+        self.truncated = False
+        self._paths: Dict[str, None] = {}
+        self._name_pattern = self._compile([pattern for pattern in self.ignore_patterns if "/" not in pattern])
+        self._path_pattern = self._compile([pattern for pattern in self.ignore_patterns if "/" in pattern])
+
+    def start(self) -> None:
+        """
+        Starts recording changes.
+        """
+
+    def stop(self) -> None:
+        """
+        Stops recording changes.
+        """
+
+    def modified_files(self) -> List[Dict[str, str]]:
+        """
+        Lists the files created or modified between `start` and `stop` that still exist.
+
+        :return: A list of dictionaries of the form {path: "", name: "", extension: "", type: ""},
+                 sorted by extension.
+        """
+        files = [get_file_details(path) for path in self._paths if os.path.isfile(path)]
+        files.sort(key=lambda x: x["extension"])
+        return files
+
+    @staticmethod
+    def _compile(patterns: List[str]) -> Optional[re.Pattern]:
+        return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns)) if patterns else None
+
+    def _ignored(self, path: str) -> bool:
+        if self._name_pattern is not None and self._name_pattern.match(os.path.basename(path)):
+            return True
+        return self._path_pattern is not None and bool(
+            self._path_pattern.match(os.path.relpath(path, self.directory))
+        )
+
+    def _record(self, path: str) -> None:
+        if path in self._paths or self._ignored(path):
+            return
+        if len(self._paths) >= self.max_files:
+            self.truncated = True
+            return
+        self._paths[path] = None
+
+    def _scan(self, directory: str):
+        """
+        Yields the directory entries of the files below a directory, skipping ignored entries.
+        """
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            if self._ignored(entry.path):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._scan(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+            except OSError:
+                continue
+
+
+class SnapshotFileTracker(FileTracker):
+    """
+    A portable tracker that compares the modification times and sizes of the files in the
+    directory when it is started and stopped.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+
+    def _take_snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for entry in self._scan(self.directory):
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def start(self) -> None:
+        self._snapshot = self._take_snapshot()
+
+    def stop(self) -> None:
+        for path, signature in self._take_snapshot().items():
+            if self._snapshot.get(path) != signature:
+                self._record(path)
+        self._snapshot = {}
+
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+inotify_event = struct.Struct("iIII")
+
+
+class InotifyFileTracker(FileTracker):
+    """
+    A Linux tracker that receives file changes from the kernel through inotify as they happen.
+    Directories created during the run are watched as soon as they appear. When the kernel
+    drops events or no more watches can be added, the tracker falls back to listing the files
+    modified since it was started.
+    """
+
+    watch_mask = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = -1
+        self._watches: Dict[int, str] = {}
+        self._overflowed = False
+        self._start_time = 0.0
+        self._stop_event = threading.Event()
+        self._wakeup: Tuple[int, int] = (-1, -1)
+        self._read_thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def available() -> bool:
+        """
+        Returns whether inotify can be used on this platform.
+        """
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            return hasattr(libc, "inotify_init1")
+        except OSError:
+            return False
+
+    def start(self) -> None:
+        self._start_time = time.time()
+        self._overflowed = False
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            logger.warning(f"Could not start inotify: {os.strerror(ctypes.get_errno())}")
+            self._overflowed = True
+            return
+        self._watch_tree(self.directory, record=False)
+        self._stop_event.clear()
+        self._wakeup = os.pipe()
+        self._read_thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._read_thread.start()
+
+    def stop(self) -> None:
+        if self._fd >= 0:
+            self._stop_event.set()
+            if self._read_thread is not None:
+                os.write(self._wakeup[1], b"\0")
+                self._read_thread.join(timeout=5)
+                self._read_thread = None
+                for wakeup_fd in self._wakeup:
+                    os.close(wakeup_fd)
+            # pick up the events queued since the last read
+            self._read_events()
+            os.close(self._fd)
+            self._fd = -1
+            self._watches = {}
+        if self._overflowed:
+            logger.warning(f"File changes were not all tracked, listing files modified in {self.directory} by mtime")
+            self._record_modified_since(self._start_time)
+            self._overflowed = False
+
+    def _add_watch(self, directory: str) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.watch_mask)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOSPC, errno.ENOMEM):
+                # out of watches, list the files from their modification times when stopped
+                self._overflowed = True
+            return False
+        self._watches[wd] = directory
+        return True
+
+    def _watch_tree(self, directory: str, record: bool) -> None:
+        """
+        Watches a directory and its subdirectories. Files already in directories created during
+        the run were written before the watch was added, so they are recorded.
+        """
+        if not self._add_watch(directory):
+            return
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not self._ignored(entry.path):
+                        self._watch_tree(entry.path, record)
+                elif record and entry.is_file(follow_symlinks=False):
+                    self._record(entry.path)
+            except OSError:
+                continue
+
+    def _read_loop(self) -> None:
+        poller = select.poll()
+        poller.register(self._fd, select.POLLIN)
+        # written to by stop, so the thread does not wait for the next event
+        poller.register(self._wakeup[0], select.POLLIN)
+        while not self._stop_event.is_set():
+            if poller.poll():
+                self._read_events()
+
+    def _read_events(self) -> None:
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                logger.error(f"Error while reading file change events: {e}")
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = inotify_event.unpack_from(data, offset)
+                offset += inotify_event.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    self._overflowed = True
+                    continue
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+                directory = self._watches.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if self._ignored(path):
+                    continue
+                if mask & IN_ISDIR:
+                    self._watch_tree(path, record=True)
+                else:
+                    self._record(path)
+
+    def _record_modified_since(self, timestamp: float) -> None:
+        for entry in self._scan(self.directory):
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime >= timestamp:
+                    self._record(entry.path)
+            except OSError:
+                continue
+
+
+def create_file_tracker(directory: str, ignore_patterns: Optional[List[str]] = None, max_files: int = 500) -> FileTracker:
+    """
+    Creates a tracker for the files modified in a directory, using inotify where available.
+
+    :param directory: The directory to track.
+    :param ignore_patterns: Glob patterns of file and directory names to ignore, `default_ignore_patterns` if not set.
+    :param max_files: The maximum number of files listed.
+    :return: The file tracker.
+    """
+    if InotifyFileTracker.available():
+        return InotifyFileTracker(directory, ignore_patterns=ignore_patterns, max_files=max_files)
+    return SnapshotFileTracker(directory, ignore_patterns=ignore_patterns, max_files=max_files)
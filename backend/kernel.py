@@ -0,0 +1,91 @@
+"""
+A long-lived Python process that runs code blocks for `LocalKernelCodeExecutor`, keeping imports
+and variables between them. It is started as a script and reads one JSON request per line from
+stdin ({"code": "", "filename": "", "cwd": ""}) and writes one JSON response per line to stdout
+({"exit_code": 0, "output": ""}). Output written by the code, including that of subprocesses it
+starts, is captured by pointing file descriptors 1 and 2 at a temporary file while it runs.
+"""
+
+import json
+import linecache
+import os
+import sys
+import tempfile
+import traceback
+from typing import Dict
+
+
+def execute(request: Dict, namespace: Dict) -> Dict:
+    """
+    Runs a code block in the kernel's namespace and captures its output.
+
+    :param request: The request with the code, the file it was saved to and the directory to run it in.
+    :param namespace: The globals shared by all code blocks.
+    :return: The response with the exit code and output of the code.
+    """
+    os.chdir(request["cwd"])
+    code = request["code"]
+    filename = request.get("filename") or "<code>"
+    # lets tracebacks show the lines of the code block
+    linecache.cache[filename] = (len(code), None, code.splitlines(True), filename)
+
+    exit_code = 0
+    with tempfile.TemporaryFile() as output:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved_fds = os.dup(1), os.dup(2)
+        os.dup2(output.fileno(), 1)
+        os.dup2(output.fileno(), 2)
+        try:
+            exec(compile(code, filename, "exec"), namespace)
+        except SystemExit as e:
+            if isinstance(e.code, int) or e.code is None:
+                exit_code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                exit_code = 1
+        except KeyboardInterrupt:
+            # sent by the executor when the code block times out, same exit code as the timeout command
+            exit_code = 124
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved_fds[0], 1)
+            os.dup2(saved_fds[1], 2)
+            for fd in saved_fds:
+                os.close(fd)
+        output.seek(0)
+        return {"exit_code": exit_code, "output": output.read().decode("utf-8", errors="replace")}
+
+
+def main() -> None:
+    # keep private copies of the pipes to the executor, so code reading stdin or writing to fd 1 cannot break the protocol
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    responses = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    # import modules from the work dir rather than from the directory of this script, as `python -c` does
+    sys.path[0] = ""
+
+    namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+    while True:
+        try:
+            line = requests.readline()
+        except KeyboardInterrupt:
+            continue
+        if not line:
+            break
+        try:
+            response = execute(json.loads(line), namespace)
+        except KeyboardInterrupt:
+            response = {"exit_code": 124, "output": ""}
+        responses.write(json.dumps(response) + "\n")
+        responses.flush()
+
+
+if __name__ == "__main__":
+    main()
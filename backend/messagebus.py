@@ -0,0 +1,167 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+class MessageBus(ABC):
+    """
+    Delivers agent messages from the process running a workflow to the process holding the
+    client's WebSocket connection. Subscribers are called with every message and are expected
+    to ignore messages for connections they do not own.
+    """
+
+    def __init__(self) -> None:
+        self.subscribers: List[Callable[[Dict], None]] = []
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> None:
+        """
+        Registers a callback invoked for every message on the bus.
+
+        :param callback: A thread-safe, non-blocking callable receiving the message.
+        """
+        self.subscribers.append(callback)
+
+    @abstractmethod
+    def publish(self, message: Dict) -> None:
+        """
+        Publishes a message to all subscribers. Safe to call from any thread.
+
+        :param message: A JSON serializable dictionary with a `connection_id` key.
+        """
+
+    def start(self) -> None:
+        """
+        Starts any background work needed to receive messages.
+        """
+
+    def stop(self) -> None:
+        """
+        Stops background work started by `start`.
+        """
+
+    def _deliver(self, message: Dict) -> None:
+        for callback in self.subscribers:
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error(f"Error while delivering message from bus: {e}")
+
+
+class InProcessMessageBus(MessageBus):
+    """
+    A message bus for single process deployments that hands messages directly to subscribers.
+    """
+
+    def publish(self, message: Dict) -> None:
+        self._deliver(message)
+
+
+class SQLiteMessageBus(MessageBus):
+    """
+    A message bus shared by all worker processes on a host (e.g. gunicorn workers) through a
+    SQLite table. Messages are delivered to local subscribers immediately; every other process
+    polls the table for messages published since its last poll. Old rows are purged after
+    `retention` seconds.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.05, retention: float = 60) -> None:
+        """
+        Initializes the bus.
+
+        :param path: The path of the SQLite database file shared by the processes.
+        :param poll_interval: Seconds between polls for messages from other processes.
+        :param retention: Seconds a published message is kept before it is purged.
+        """
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex}"
+        self._local = threading.local()
+        self._stop_event = threading.Event()
+        self._poll_thread: Optional[threading.Thread] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def start(self) -> None:
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS bus_message ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL, created_at REAL NOT NULL, payload TEXT NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS ix_bus_message_created_at ON bus_message (created_at)")
+        last_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM bus_message").fetchone()[0]
+        self._stop_event.clear()
+        self._poll_thread = threading.Thread(target=self._poll, args=(last_id,), daemon=True)
+        self._poll_thread.start()
+        logger.info(f"Started SQLite message bus at {self.path}")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._poll_thread is not None:
+            self._poll_thread.join(timeout=5)
+            self._poll_thread = None
+
+    def publish(self, message: Dict) -> None:
+        # deliver locally without a round trip, other processes pick the message up from the table
+        self._deliver(message)
+        try:
+            self._connection().execute(
+                "INSERT INTO bus_message (origin, created_at, payload) VALUES (?, ?, ?)",
+                (self.origin, time.time(), json.dumps(message, default=str)),
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Error while publishing message to bus: {e}")
+
+    def _poll(self, last_id: int) -> None:
+        last_purge = 0.0
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                connection = self._connection()
+                rows = connection.execute(
+                    "SELECT id, origin, payload FROM bus_message WHERE id > ? ORDER BY id", (last_id,)
+                ).fetchall()
+                for row_id, origin, payload in rows:
+                    last_id = row_id
+                    if origin != self.origin:
+                        self._deliver(json.loads(payload))
+                now = time.time()
+                if now - last_purge > self.retention:
+                    connection.execute("DELETE FROM bus_message WHERE created_at < ?", (now - self.retention,))
+                    last_purge = now
+            except sqlite3.Error as e:
+                logger.error(f"Error while polling message bus: {e}")
+
+
+message_bus_backends = ["inprocess", "sqlite"]
+
+
+def create_message_bus(backend: str = "inprocess", app_root: Optional[str] = None) -> MessageBus:
+    """
+    Creates a message bus.
+
+    :param backend: The bus backend, one of `message_bus_backends`. Use "sqlite" when running more than one worker process.
+    :param app_root: The application directory used to store the shared bus database.
+    :return: The message bus.
+    """
+    if backend == "inprocess":
+        return InProcessMessageBus()
+    elif backend == "sqlite":
+        if app_root is None:
+            raise ValueError("app_root is required for the sqlite message bus")
+        return SQLiteMessageBus(path=os.path.join(app_root, "messagebus.sqlite"))
+    raise ValueError(f"Invalid message bus backend: {backend}. Valid backends are: {message_bus_backends}")
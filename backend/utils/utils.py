@@ -1,19 +1,25 @@
+import ast
 import base64
+import copy
+import functools
 import hashlib
 import os
 import re
 import shutil
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from dotenv import load_dotenv
 from loguru import logger
 
 from autogen.coding import DockerCommandLineCodeExecutor, LocalCommandLineCodeExecutor
 from autogen.oai.client import ModelClient, OpenAIWrapper
+from autogen.token_count_utils import count_token
 
-from ..datamodel import CodeExecutionConfigTypes, Model, Skill
+from ..codeexecutors import LocalKernelCodeExecutor
+from ..datamodel import CodeExecutionConfigTypes, Model, Skill, SkillsPromptMode
 from ..version import APP_NAME
 
 
@@ -178,53 +184,23 @@ def serialize_file(file_path: str) -> Tuple[str, str]:
     return base64_encoded_content, file_type
 
 
-def get_modified_files(start_timestamp: float, end_timestamp: float, source_dir: str) -> List[Dict[str, str]]:
+def get_file_details(file_path: str) -> Dict[str, str]:
     """
-    Identify files from source_dir that were modified within a specified timestamp range.
-    The function excludes files with certain file extensions and names.
+    Describe a file in a work dir for listing in a message's metadata.
 
-    :param start_timestamp: The floating-point number representing the start timestamp to filter modified files.
-    :param end_timestamp: The floating-point number representing the end timestamp to filter modified files.
-    :param source_dir: The directory to search for modified files.
-
-    :return: A list of dictionaries with details of relative file paths that were modified.
-             Dictionary format: {path: "", name: "", extension: "", type: ""}
-             Files with extensions "__pycache__", "*.pyc", "__init__.py", and "*.cache"
-             are ignored.
+    :param file_path: The path of the file.
+    :return: A dictionary of the form {path: "", name: "", extension: "", type: ""}, where path is
+             relative to the user files directory.
     """
-    modified_files = []
-    ignore_extensions = {".pyc", ".cache"}
-    ignore_files = {"__pycache__", "__init__.py"}
-
-    # Walk through the directory tree
-    for root, dirs, files in os.walk(source_dir):
-        # Update directories and files to exclude those to be ignored
-        dirs[:] = [d for d in dirs if d not in ignore_files]
-        files[:] = [f for f in files if f not in ignore_files and os.path.splitext(f)[1] not in ignore_extensions]
-
-        for file in files:
-            file_path = os.path.join(root, file)
-            file_mtime = os.path.getmtime(file_path)
-
-            # Verify if the file was modified within the given timestamp range
-            if start_timestamp <= file_mtime <= end_timestamp:
-                file_relative_path = (
-                    "files/user" + file_path.split("files/user", 1)[1] if "files/user" in file_path else ""
-                )
-                file_type = get_file_type(file_path)
-
-                file_dict = {
-                    "path": file_relative_path,
-                    "name": os.path.basename(file),
-                    # Remove the dot
-                    "extension": os.path.splitext(file)[1].lstrip("."),
-                    "type": file_type,
-                }
-                modified_files.append(file_dict)
-
-    # Sort the modified files by extension
-    modified_files.sort(key=lambda x: x["extension"])
-    return modified_files
+    file_relative_path = "files/user" + file_path.split("files/user", 1)[1] if "files/user" in file_path else ""
+    file_name = os.path.basename(file_path)
+    return {
+        "path": file_relative_path,
+        "name": file_name,
+        # Remove the dot
+        "extension": os.path.splitext(file_name)[1].lstrip("."),
+        "type": get_file_type(file_path),
+    }
 
 
 def get_app_root() -> str:
@@ -289,14 +265,80 @@ def init_app_folders(app_file_path: str) -> Dict[str, str]:
     return folders
 
 
-def get_skills_from_prompt(skills: List[Skill], work_dir: str) -> str:
+def _write_skills_bundle(content: str, bundle_path: str) -> None:
+    """
+    Write a skills bundle atomically, so concurrent readers never copy a partly written bundle.
     """
-    Create a prompt with the content of all skills and write the skills to a file named skills.py in the work_dir.
+    os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
+    tmp_path = f"{bundle_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write(content)
+    os.replace(tmp_path, bundle_path)
 
-    :param skills: A dictionary skills
-    :return: A string containing the content of all skills
+
+def _file_md5(path: str) -> Optional[str]:
+    """
+    Compute the MD5 hash of the content of a file, or None if it cannot be read.
     """
+    try:
+        with open(path, "rb") as f:
+            return hashlib.md5(f.read()).hexdigest()
+    except OSError:
+        return None
+
 
+def _stub(node: Union[ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef]) -> ast.AST:
+    """
+    Reduce a function or class definition to its signature, docstring and, for classes, the stubs of its public methods.
+    """
+    stub = copy.copy(node)
+    docstring = ast.get_docstring(node, clean=False)
+    stub.body = [ast.Expr(ast.Constant(docstring))] if docstring is not None else []
+    if isinstance(node, ast.ClassDef):
+        stub.body += [
+            _stub(child)
+            for child in node.body
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef))
+            and (not child.name.startswith("_") or child.name == "__init__")
+        ]
+    if not stub.body or not isinstance(stub.body[-1], (ast.FunctionDef, ast.AsyncFunctionDef)):
+        stub.body.append(ast.Expr(ast.Constant(...)))
+    return stub
+
+
+@functools.lru_cache(maxsize=1024)
+def get_skill_signatures(content: str) -> str:
+    """
+    Extract the signatures and docstrings of the public functions and classes of a skill, which is all an agent needs
+    to call them from skills.py. Results are cached by the skill content.
+
+    :param content: The source code of the skill.
+    :return: The signatures, or the source code when it cannot be parsed or defines no public functions or classes.
+    """
+    try:
+        tree = ast.parse(content)
+    except SyntaxError:
+        return content
+    stubs = [
+        ast.unparse(_stub(node))
+        for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and not node.name.startswith("_")
+    ]
+    return "\n\n".join(stubs) if stubs else content
+
+
+@functools.lru_cache(maxsize=256)
+def _get_skills_bundle(
+    skills: Tuple[Tuple[str, str], ...], prompt_mode: SkillsPromptMode = SkillsPromptMode.full
+) -> Tuple[str, str, str, str]:
+    """
+    Build the prompt and skills.py content of a set of skills once, and write the content to a
+    bundle in the shared skills cache dir named by its hash.
+
+    :param skills: The name and content of each skill.
+    :param prompt_mode: Whether the prompt holds the source code or only the signatures of the skills.
+    :return: The prompt, the skills.py content, its MD5 hash and the path of the bundle.
+    """
     instruction = """
 
 While solving the task you may use functions below which will be available in a file called skills.py .
@@ -306,26 +348,77 @@ install via pip and use --quiet option.
 
          """
     prompt = ""  # filename:  skills.py
-    for skill in skills:
+    for name, content in skills:
         prompt += f"""
 
-##### Begin of {skill.name} #####
+##### Begin of {name} #####
 
-{skill.content}
+{content}
 
-#### End of {skill.name} ####
+#### End of {name} ####
 
         """
 
+    cache_dir = os.environ.get("AUTOGENSTUDIO_SKILLS_CACHE_DIR") or os.path.join(get_app_root(), "skills")
+    digest = md5_hash(prompt)
+    bundle_path = os.path.join(cache_dir, f"skills_{digest}.py")
+    if _file_md5(bundle_path) != digest:
+        _write_skills_bundle(prompt, bundle_path)
+
+    if prompt_mode == SkillsPromptMode.signatures:
+        # skills.py still holds the full source code
+        signatures = ""
+        for name, content in skills:
+            signatures += f"""
+
+##### Begin of {name} #####
+
+{get_skill_signatures(content)}
+
+#### End of {name} ####
+
+        """
+        return instruction + signatures, prompt, digest, bundle_path
+    return instruction + prompt, prompt, digest, bundle_path
+
+
+def get_skills_from_prompt(
+    skills: List[Skill], work_dir: str, prompt_mode: SkillsPromptMode = SkillsPromptMode.full
+) -> str:
+    """
+    Create a prompt with the content of all skills and make the skills available in a file named skills.py in the
+    work_dir. The prompt and file of each set of skills are built once and the file is copied into the work_dir
+    from the shared skills cache dir, so code run in the work_dir cannot change the shared bundle.
+
+    :param skills: A dictionary skills
+    :param prompt_mode: Whether the prompt holds the source code or only the signatures and docstrings of the skills.
+    :return: A string containing the content of all skills
+    """
+    prompt_mode = SkillsPromptMode(prompt_mode or SkillsPromptMode.full)
+    skills_key = tuple((skill.name, skill.content) for skill in skills)
+    prompt, content, digest, bundle_path = _get_skills_bundle(skills_key, prompt_mode)
+
     # check if work_dir exists
     if not os.path.exists(work_dir):
         os.makedirs(work_dir)
 
-    # overwrite skills.py in work_dir
-    with open(os.path.join(work_dir, "skills.py"), "w", encoding="utf-8") as f:
-        f.write(prompt)
+    skills_path = os.path.join(work_dir, "skills.py")
+    if _file_md5(skills_path) == digest:
+        return prompt
 
-    return instruction + prompt
+    # replace skills.py in work_dir
+    tmp_path = f"{skills_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        shutil.copyfile(bundle_path, tmp_path)
+    except OSError:
+        pass
+    if _file_md5(tmp_path) != digest:
+        # the bundle was removed or changed since it was cached
+        _write_skills_bundle(content, bundle_path)
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+    os.replace(tmp_path, skills_path)
+    return prompt
 
 
 def delete_files_in_folder(folders: Union[str, List[str]]) -> None:
@@ -411,24 +504,29 @@ def test_model(model: Model):
     return response.choices[0].message.content
 
 
-def load_code_execution_config(code_execution_type: CodeExecutionConfigTypes, work_dir: str):
+def load_code_execution_config(code_execution_type: CodeExecutionConfigTypes, work_dir: str, executor_pool: Any = None):
     """
     Load the code execution configuration based on the code execution type.
 
     :param code_execution_type: The code execution type.
     :param work_dir: The working directory to store code execution files.
+    :param executor_pool: An optional `CodeExecutorPool` the executor is taken from instead of creating a new one.
     :return: The code execution configuration.
 
     """
     work_dir = Path(work_dir)
     work_dir.mkdir(exist_ok=True)
     executor = None
-    if code_execution_type == CodeExecutionConfigTypes.local:
+    if code_execution_type == CodeExecutionConfigTypes.none:
+        return False
+    elif executor_pool is not None:
+        executor = executor_pool.acquire(code_execution_type, work_dir)
+    elif code_execution_type == CodeExecutionConfigTypes.local:
         executor = LocalCommandLineCodeExecutor(work_dir=work_dir)
+    elif code_execution_type == CodeExecutionConfigTypes.kernel:
+        executor = LocalKernelCodeExecutor(work_dir=work_dir)
     elif code_execution_type == CodeExecutionConfigTypes.docker:
         executor = DockerCommandLineCodeExecutor(work_dir=work_dir)
-    elif code_execution_type == CodeExecutionConfigTypes.none:
-        return False
     else:
         raise ValueError(f"Invalid code execution type: {code_execution_type}")
     code_execution_config = {
@@ -437,9 +535,109 @@ def load_code_execution_config(code_execution_type: CodeExecutionConfigTypes, wo
     return code_execution_config
 
 
-def summarize_chat_history(task: str, messages: List[Dict[str, str]], client: ModelClient):
+# set when the tokenizer cannot be loaded (e.g. tiktoken cannot download its encodings offline)
+_tokenizer_unavailable = False
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """
+    Count the tokens of a text with the model's tokenizer, or estimate them as one token per four
+    characters when the tokenizer is not available.
+
+    :param text: The text to count the tokens of.
+    :param model: The model whose tokenizer is used.
+    :return: The number of tokens.
+    """
+    global _tokenizer_unavailable
+    if not _tokenizer_unavailable:
+        try:
+            return count_token(text, model=model)
+        except Exception as e:
+            logger.warning(f"Tokenizer unavailable, estimating token counts from text length: {e}")
+            _tokenizer_unavailable = True
+    return len(text) // 4 + 1
+
+
+def _truncate_content(content: str, max_chars: int) -> str:
     """
-    Summarize the chat history using the model endpoint and returning the response.
+    Shorten a long message content to its head and tail, which hold the command and the result of
+    long code outputs.
+
+    :param content: The message content.
+    :param max_chars: The maximum number of characters kept.
+    :return: The content, shortened when it is longer than max_chars.
+    """
+    if len(content) <= max_chars:
+        return content
+    head = max_chars * 2 // 3
+    tail = max_chars - head
+    return f"{content[:head]}\n... [{len(content) - max_chars} characters omitted] ...\n{content[-tail:]}"
+
+
+def render_transcript(
+    messages: List[Dict[str, Any]],
+    max_tokens: Optional[int] = None,
+    max_content_chars: int = 2000,
+    model: str = "gpt-4",
+) -> str:
+    """
+    Render chat messages as a compact "speaker: content" transcript for a model prompt, leaving out
+    message metadata. Repeated messages are left out, long contents are shortened to their head and
+    tail and, when the transcript exceeds max_tokens, the oldest messages after the first are dropped.
+
+    :param messages: Agent history payloads (with sender and message keys) or messages with role and content keys.
+    :param max_tokens: The maximum number of tokens of the transcript, or None for no limit.
+    :param max_content_chars: The maximum number of characters kept of each message content.
+    :param model: The model whose tokenizer is used to count tokens.
+    :return: The transcript.
+    """
+    lines = []
+    seen = set()
+    for message in messages:
+        inner = message.get("message", message)
+        if not isinstance(inner, dict):
+            inner = {"content": inner}
+        speaker = message.get("sender") or inner.get("name") or inner.get("role") or "user"
+        content = inner.get("content")
+        if isinstance(content, list):
+            content = "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+        content = str(content or "").strip()
+        calls = inner.get("tool_calls") or ([inner["function_call"]] if inner.get("function_call") else [])
+        for call in calls:
+            function = call.get("function", call)
+            content += f"\n[calls {function.get('name')}({function.get('arguments', '')})]"
+        content = content.strip()
+        if not content or (speaker, content) in seen:
+            continue
+        seen.add((speaker, content))
+        lines.append(f"{speaker}: {_truncate_content(content, max_content_chars)}")
+
+    if max_tokens is None or not lines or count_tokens("\n".join(lines), model) <= max_tokens:
+        return "\n".join(lines)
+    # keep the first message, which usually holds the task, and as many of the latest as fit
+    kept = []
+    budget = max_tokens - count_tokens(lines[0], model)
+    for line in reversed(lines[1:]):
+        tokens = count_tokens(line, model)
+        if tokens > budget:
+            break
+        kept.append(line)
+        budget -= tokens
+    omitted = len(lines) - 1 - len(kept)
+    return "\n".join([lines[0], f"[{omitted} messages omitted]"] + kept[::-1])
+
+
+def summarize_chat_history(
+    task: str,
+    messages: List[Dict[str, str]],
+    client: ModelClient,
+    previous_summary: Optional[str] = None,
+    max_tokens: Optional[int] = 8000,
+):
+    """
+    Summarize the chat history using the model endpoint and returning the response. When the summary of
+    the earlier history is given, only the new messages are sent and merged into it. The messages are sent
+    as a compact transcript of at most max_tokens tokens, see `render_transcript`.
     """
     summarization_system_prompt = f"""
     You are a helpful assistant that is able to review the chat history between a set of agents (userproxy agents, assistants etc) as they try to address a given TASK and provide a summary. Be SUCCINCT but also comprehensive enough to allow others (who cannot see the chat history) understand and recreate the solution.
@@ -450,6 +648,14 @@ def summarize_chat_history(task: str, messages: List[Dict[str, str]], client: Mo
     ===
     The summary should focus on extracting the actual solution to the task from the chat history (assuming the task was addressed) such that any other agent reading the summary will understand what the actual solution is. Use a neutral tone and DO NOT directly mention the agents. Instead only focus on the actions that were carried out (e.g. do not say 'assistant agent generated some code visualization code ..'  instead say say 'visualization code was generated ..'. The answer should be framed as a response to the user task. E.g. if the task is "What is the height of the Eiffel tower", the summary should be "The height of the Eiffel Tower is ...").
     """
+    transcript = render_transcript(messages, max_tokens=max_tokens)
+    if previous_summary:
+        summarization_request = (
+            f"This is the summary of the earlier chat history:\n===\n{previous_summary}\n===\n"
+            f"Update the summary with the following new messages, keeping what is still relevant.\n{transcript}"
+        )
+    else:
+        summarization_request = f"Summarize the following chat history.\n{transcript}"
     summarization_prompt = [
         {
             "role": "system",
@@ -457,7 +663,7 @@ def summarize_chat_history(task: str, messages: List[Dict[str, str]], client: Mo
         },
         {
             "role": "user",
-            "content": f"Summarize the following chat history. {str(messages)}",
+            "content": summarization_request,
         },
     ]
     response = client.create(messages=summarization_prompt, cache_seed=None)
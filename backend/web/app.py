@@ -1,77 +1,97 @@
 import asyncio
 import os
-import queue
-import threading
 import traceback
 from contextlib import asynccontextmanager
-from typing import Any
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import Body, FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from loguru import logger
 from openai import OpenAIError
 
-from ..chatmanager import AutoGenChatManager, WebSocketConnectionManager
+from ..chatmanager import AutoGenChatManager, WebSocketConnectionManager, WorkflowExecutionPool
+from ..codeexecutors import CodeExecutorPool
 from ..database import workflow_from_id
-from ..database.dbmanager import DBManager
-from ..datamodel import Agent, Message, Model, Response, Session, Skill, Workflow
-from ..utils import check_and_cast_datetime_fields, init_app_folders, md5_hash, test_model
+from ..database.dbmanager import AsyncDBManager, DBManager, encode_cursor
+from ..datamodel import Agent, HistoryStrategy, Message, Model, Response, Session, Skill, Workflow
+from ..messagebus import create_message_bus
+from ..workflowmanager import WorkflowManagerPool
+from ..utils import check_and_cast_datetime_fields, count_tokens, init_app_folders, md5_hash, test_model
 from ..version import VERSION
 
 managers = {"chat": None}  # manage calls to autogen
-# Create thread-safe queue for messages between api thread and autogen threads
-message_queue = queue.Queue()
-active_connections = []
+# session summaries being refreshed after a turn, referenced until they finish
+summary_tasks = set()
+# the sessions whose summary is being refreshed, with the turn to refresh it for next if another turn finished meanwhile
+summary_refreshes: Dict[int, Optional[Tuple[Message, Dict]]] = {}
+# the maximum number of messages merged into a session summary per turn, the rest follow in later turns
+summary_batch_size = 100
+active_connections = {}
 active_connections_lock = asyncio.Lock()
+# agent messages published on the message bus are handed to the event loop by the websocket manager
 websocket_manager = WebSocketConnectionManager(
     active_connections=active_connections,
     active_connections_lock=active_connections_lock,
+    max_buffered_messages=int(os.environ.get("AUTOGENSTUDIO_WS_MAX_BUFFERED_MESSAGES", 256)),
+    slow_consumer_policy=os.environ.get("AUTOGENSTUDIO_WS_SLOW_CONSUMER_POLICY", "drop_oldest"),
 )
 
 
-def message_handler():
-    while True:
-        message = message_queue.get()
-        logger.info(
-            "** Processing Agent Message on Queue: Active Connections: "
-            + str([client_id for _, client_id in websocket_manager.active_connections])
-            + " **"
-        )
-        for connection, socket_client_id in websocket_manager.active_connections:
-            if message["connection_id"] == socket_client_id:
-                logger.info(
-                    f"Sending message to connection_id: {message['connection_id']}. Connection ID: {socket_client_id}"
-                )
-                asyncio.run(websocket_manager.send_message(message, connection))
-            else:
-                logger.info(
-                    f"Skipping message for connection_id: {message['connection_id']}. Connection ID: {socket_client_id}"
-                )
-        message_queue.task_done()
-
-
-message_handler_thread = threading.Thread(target=message_handler, daemon=True)
-message_handler_thread.start()
-
-
 app_file_path = os.path.dirname(os.path.abspath(__file__))
 folders = init_app_folders(app_file_path)
 ui_folder_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ui")
 
 database_engine_uri = folders["database_engine_uri"]
-dbmanager = DBManager(engine_uri=database_engine_uri)
+dbmanager = DBManager(
+    engine_uri=database_engine_uri,
+    pool_size=int(os.environ.get("AUTOGENSTUDIO_DB_POOL_SIZE", 10)),
+    max_overflow=int(os.environ.get("AUTOGENSTUDIO_DB_MAX_OVERFLOW", 20)),
+    pool_recycle=int(os.environ.get("AUTOGENSTUDIO_DB_POOL_RECYCLE", 1800)),
+    sqlite_busy_timeout=int(os.environ.get("AUTOGENSTUDIO_DB_BUSY_TIMEOUT", 30)),
+)
+# the api routes query through the async engine so they do not block the event loop
+async_dbmanager = AsyncDBManager(dbmanager)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("***** App started *****")
-    managers["chat"] = AutoGenChatManager(message_queue=message_queue)
+    execution_pool = WorkflowExecutionPool(
+        max_workers=int(os.environ.get("AUTOGENSTUDIO_WORKFLOW_WORKERS", 16)),
+        max_queue_size=int(os.environ.get("AUTOGENSTUDIO_WORKFLOW_QUEUE_SIZE", 64)),
+    )
+    websocket_manager.bind_loop(asyncio.get_running_loop())
+    # agent messages may be produced by a workflow running in another worker process
+    message_bus = create_message_bus(
+        backend=os.environ.get("AUTOGENSTUDIO_MESSAGE_BUS", "inprocess"),
+        app_root=folders["app_root"],
+    )
+    message_bus.subscribe(websocket_manager.dispatch)
+    message_bus.start()
+    workflow_pool = WorkflowManagerPool(
+        max_size=int(os.environ.get("AUTOGENSTUDIO_WORKFLOW_POOL_SIZE", 32)),
+        idle_ttl=float(os.environ.get("AUTOGENSTUDIO_WORKFLOW_POOL_TTL", 900)),
+    )
+    executor_pool = CodeExecutorPool(
+        idle_ttl=float(os.environ.get("AUTOGENSTUDIO_EXECUTOR_POOL_TTL", 600)),
+        max_idle=int(os.environ.get("AUTOGENSTUDIO_EXECUTOR_POOL_SIZE", 16)),
+    )
+    managers["chat"] = AutoGenChatManager(
+        message_bus=message_bus,
+        execution_pool=execution_pool,
+        workflow_pool=workflow_pool,
+        stream_tokens=os.environ.get("AUTOGENSTUDIO_STREAM_TOKENS", "False").lower() == "true",
+        executor_pool=executor_pool,
+    )
     dbmanager.create_db_and_tables()
 
     yield
     # Close all active connections
     await websocket_manager.disconnect_all()
+    execution_pool.shutdown(wait=False)
+    executor_pool.shutdown()
+    message_bus.stop()
+    await async_dbmanager.dispose()
     print("***** App stopped *****")
 
 
@@ -108,11 +128,11 @@ api.mount(
 # manage websocket connections
 
 
-def create_entity(model: Any, model_class: Any, filters: dict = None):
+async def create_entity(model: Any, model_class: Any, filters: dict = None):
     """Create a new entity"""
     model = check_and_cast_datetime_fields(model)
     try:
-        response: Response = dbmanager.upsert(model)
+        response: Response = await async_dbmanager.upsert(model)
         return response.model_dump(mode="json")
 
     except Exception as ex_error:
@@ -123,54 +143,69 @@ def create_entity(model: Any, model_class: Any, filters: dict = None):
         }
 
 
-def list_entity(
+async def list_entity(
     model_class: Any,
     filters: dict = None,
     return_json: bool = True,
     order: str = "desc",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
 ):
-    """List all entities for a user"""
-    return dbmanager.get(model_class, filters=filters, return_json=return_json, order=order)
+    """List all entities for a user, a page at a time when a limit or cursor is given"""
+    return await async_dbmanager.get(
+        model_class,
+        filters=filters,
+        return_json=return_json,
+        order=order,
+        limit=limit,
+        cursor=cursor,
+        fields=[field.strip() for field in fields.split(",") if field.strip()] if fields else None,
+    )
 
 
-def delete_entity(model_class: Any, filters: dict = None):
+async def delete_entity(model_class: Any, filters: dict = None):
     """Delete an entity"""
 
-    return dbmanager.delete(filters=filters, model_class=model_class)
+    return await async_dbmanager.delete(filters=filters, model_class=model_class)
 
 
 @api.get("/skills")
-async def list_skills(user_id: str):
+async def list_skills(
+    user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None
+):
     """List all skills for a user"""
     filters = {"user_id": user_id}
-    return list_entity(Skill, filters=filters)
+    return await list_entity(Skill, filters=filters, limit=limit, cursor=cursor, fields=fields)
 
 
 @api.post("/skills")
 async def create_skill(skill: Skill):
     """Create a new skill"""
     filters = {"user_id": skill.user_id}
-    return create_entity(skill, Skill, filters=filters)
+    return await create_entity(skill, Skill, filters=filters)
 
 
 @api.delete("/skills/delete")
 async def delete_skill(skill_id: int, user_id: str):
     """Delete a skill"""
     filters = {"id": skill_id, "user_id": user_id}
-    return delete_entity(Skill, filters=filters)
+    return await delete_entity(Skill, filters=filters)
 
 
 @api.get("/models")
-async def list_models(user_id: str):
+async def list_models(
+    user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None
+):
     """List all models for a user"""
     filters = {"user_id": user_id}
-    return list_entity(Model, filters=filters)
+    return await list_entity(Model, filters=filters, limit=limit, cursor=cursor, fields=fields)
 
 
 @api.post("/models")
 async def create_model(model: Model):
     """Create a new model"""
-    return create_entity(model, Model)
+    return await create_entity(model, Model)
 
 
 @api.post("/models/test")
@@ -194,69 +229,103 @@ async def test_model_endpoint(model: Model):
 async def delete_model(model_id: int, user_id: str):
     """Delete a model"""
     filters = {"id": model_id, "user_id": user_id}
-    return delete_entity(Model, filters=filters)
+    return await delete_entity(Model, filters=filters)
 
 
 @api.get("/agents")
-async def list_agents(user_id: str):
+async def list_agents(
+    user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None
+):
     """List all agents for a user"""
     filters = {"user_id": user_id}
-    return list_entity(Agent, filters=filters)
+    return await list_entity(Agent, filters=filters, limit=limit, cursor=cursor, fields=fields)
 
 
 @api.post("/agents")
 async def create_agent(agent: Agent):
     """Create a new agent"""
-    return create_entity(agent, Agent)
+    return await create_entity(agent, Agent)
 
 
 @api.delete("/agents/delete")
 async def delete_agent(agent_id: int, user_id: str):
     """Delete an agent"""
     filters = {"id": agent_id, "user_id": user_id}
-    return delete_entity(Agent, filters=filters)
+    return await delete_entity(Agent, filters=filters)
 
 
 @api.post("/agents/link/model/{agent_id}/{model_id}")
 async def link_agent_model(agent_id: int, model_id: int):
     """Link a model to an agent"""
-    return dbmanager.link(link_type="agent_model", primary_id=agent_id, secondary_id=model_id)
+    return await async_dbmanager.link(link_type="agent_model", primary_id=agent_id, secondary_id=model_id)
 
 
 @api.delete("/agents/link/model/{agent_id}/{model_id}")
 async def unlink_agent_model(agent_id: int, model_id: int):
     """Unlink a model from an agent"""
-    return dbmanager.unlink(link_type="agent_model", primary_id=agent_id, secondary_id=model_id)
+    return await async_dbmanager.unlink(link_type="agent_model", primary_id=agent_id, secondary_id=model_id)
 
 
 @api.get("/agents/link/model/{agent_id}")
 async def get_agent_models(agent_id: int):
     """Get all models linked to an agent"""
-    return dbmanager.get_linked_entities("agent_model", agent_id, return_json=True)
+    return await async_dbmanager.get_linked_entities("agent_model", agent_id, return_json=True)
+
+
+@api.post("/agents/link/model/{agent_id}")
+async def link_agent_models(agent_id: int, model_ids: List[int] = Body(...)):
+    """Link many models to an agent in one request"""
+    return await async_dbmanager.link_many(
+        link_type="agent_model", primary_id=agent_id, secondary_ids=model_ids
+    )
+
+
+@api.delete("/agents/link/model/{agent_id}")
+async def unlink_agent_models(agent_id: int, model_ids: List[int] = Body(...)):
+    """Unlink many models from an agent in one request"""
+    return await async_dbmanager.unlink_many(
+        link_type="agent_model", primary_id=agent_id, secondary_ids=model_ids
+    )
 
 
 @api.post("/agents/link/skill/{agent_id}/{skill_id}")
 async def link_agent_skill(agent_id: int, skill_id: int):
     """Link an a skill to an agent"""
-    return dbmanager.link(link_type="agent_skill", primary_id=agent_id, secondary_id=skill_id)
+    return await async_dbmanager.link(link_type="agent_skill", primary_id=agent_id, secondary_id=skill_id)
 
 
 @api.delete("/agents/link/skill/{agent_id}/{skill_id}")
 async def unlink_agent_skill(agent_id: int, skill_id: int):
     """Unlink an a skill from an agent"""
-    return dbmanager.unlink(link_type="agent_skill", primary_id=agent_id, secondary_id=skill_id)
+    return await async_dbmanager.unlink(link_type="agent_skill", primary_id=agent_id, secondary_id=skill_id)
 
 
 @api.get("/agents/link/skill/{agent_id}")
 async def get_agent_skills(agent_id: int):
     """Get all skills linked to an agent"""
-    return dbmanager.get_linked_entities("agent_skill", agent_id, return_json=True)
+    return await async_dbmanager.get_linked_entities("agent_skill", agent_id, return_json=True)
+
+
+@api.post("/agents/link/skill/{agent_id}")
+async def link_agent_skills(agent_id: int, skill_ids: List[int] = Body(...)):
+    """Link many skills to an agent in one request"""
+    return await async_dbmanager.link_many(
+        link_type="agent_skill", primary_id=agent_id, secondary_ids=skill_ids
+    )
+
+
+@api.delete("/agents/link/skill/{agent_id}")
+async def unlink_agent_skills(agent_id: int, skill_ids: List[int] = Body(...)):
+    """Unlink many skills from an agent in one request"""
+    return await async_dbmanager.unlink_many(
+        link_type="agent_skill", primary_id=agent_id, secondary_ids=skill_ids
+    )
 
 
 @api.post("/agents/link/agent/{primary_agent_id}/{secondary_agent_id}")
 async def link_agent_agent(primary_agent_id: int, secondary_agent_id: int):
     """Link an agent to another agent"""
-    return dbmanager.link(
+    return await async_dbmanager.link(
         link_type="agent_agent",
         primary_id=primary_agent_id,
         secondary_id=secondary_agent_id,
@@ -266,7 +335,7 @@ async def link_agent_agent(primary_agent_id: int, secondary_agent_id: int):
 @api.delete("/agents/link/agent/{primary_agent_id}/{secondary_agent_id}")
 async def unlink_agent_agent(primary_agent_id: int, secondary_agent_id: int):
     """Unlink an agent from another agent"""
-    return dbmanager.unlink(
+    return await async_dbmanager.unlink(
         link_type="agent_agent",
         primary_id=primary_agent_id,
         secondary_id=secondary_agent_id,
@@ -276,40 +345,58 @@ async def unlink_agent_agent(primary_agent_id: int, secondary_agent_id: int):
 @api.get("/agents/link/agent/{agent_id}")
 async def get_linked_agents(agent_id: int):
     """Get all agents linked to an agent"""
-    return dbmanager.get_linked_entities("agent_agent", agent_id, return_json=True)
+    return await async_dbmanager.get_linked_entities("agent_agent", agent_id, return_json=True)
+
+
+@api.post("/agents/link/agent/{agent_id}")
+async def link_agent_agents(agent_id: int, agent_ids: List[int] = Body(...)):
+    """Link many agents to an agent in one request"""
+    return await async_dbmanager.link_many(
+        link_type="agent_agent", primary_id=agent_id, secondary_ids=agent_ids
+    )
+
+
+@api.delete("/agents/link/agent/{agent_id}")
+async def unlink_agent_agents(agent_id: int, agent_ids: List[int] = Body(...)):
+    """Unlink many agents from an agent in one request"""
+    return await async_dbmanager.unlink_many(
+        link_type="agent_agent", primary_id=agent_id, secondary_ids=agent_ids
+    )
 
 
 @api.get("/workflows")
-async def list_workflows(user_id: str):
+async def list_workflows(
+    user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None
+):
     """List all workflows for a user"""
     filters = {"user_id": user_id}
-    return list_entity(Workflow, filters=filters)
+    return await list_entity(Workflow, filters=filters, limit=limit, cursor=cursor, fields=fields)
 
 
 @api.get("/workflows/{workflow_id}")
 async def get_workflow(workflow_id: int, user_id: str):
     """Get a workflow"""
     filters = {"id": workflow_id, "user_id": user_id}
-    return list_entity(Workflow, filters=filters)
+    return await list_entity(Workflow, filters=filters)
 
 
 @api.post("/workflows")
 async def create_workflow(workflow: Workflow):
     """Create a new workflow"""
-    return create_entity(workflow, Workflow)
+    return await create_entity(workflow, Workflow)
 
 
 @api.delete("/workflows/delete")
 async def delete_workflow(workflow_id: int, user_id: str):
     """Delete a workflow"""
     filters = {"id": workflow_id, "user_id": user_id}
-    return delete_entity(Workflow, filters=filters)
+    return await delete_entity(Workflow, filters=filters)
 
 
 @api.post("/workflows/link/agent/{workflow_id}/{agent_id}/{agent_type}")
 async def link_workflow_agent(workflow_id: int, agent_id: int, agent_type: str):
     """Link an agent to a workflow"""
-    return dbmanager.link(
+    return await async_dbmanager.link(
         link_type="workflow_agent",
         primary_id=workflow_id,
         secondary_id=agent_id,
@@ -320,7 +407,7 @@ async def link_workflow_agent(workflow_id: int, agent_id: int, agent_type: str):
 @api.delete("/workflows/link/agent/{workflow_id}/{agent_id}/{agent_type}")
 async def unlink_workflow_agent(workflow_id: int, agent_id: int, agent_type: str):
     """Unlink an agent from a workflow"""
-    return dbmanager.unlink(
+    return await async_dbmanager.unlink(
         link_type="workflow_agent",
         primary_id=workflow_id,
         secondary_id=agent_id,
@@ -331,7 +418,7 @@ async def unlink_workflow_agent(workflow_id: int, agent_id: int, agent_type: str
 @api.get("/workflows/link/agent/{workflow_id}/{agent_type}")
 async def get_linked_workflow_agents(workflow_id: int, agent_type: str):
     """Get all agents linked to a workflow"""
-    return dbmanager.get_linked_entities(
+    return await async_dbmanager.get_linked_entities(
         link_type="workflow_agent",
         primary_id=workflow_id,
         agent_type=agent_type,
@@ -339,52 +426,187 @@ async def get_linked_workflow_agents(workflow_id: int, agent_type: str):
     )
 
 
+@api.post("/workflows/link/agent/{workflow_id}/{agent_type}")
+async def link_workflow_agents(workflow_id: int, agent_type: str, agent_ids: List[int] = Body(...)):
+    """Link many agents to a workflow in one request"""
+    return await async_dbmanager.link_many(
+        link_type="workflow_agent", primary_id=workflow_id, secondary_ids=agent_ids, agent_type=agent_type
+    )
+
+
+@api.delete("/workflows/link/agent/{workflow_id}/{agent_type}")
+async def unlink_workflow_agents(workflow_id: int, agent_type: str, agent_ids: List[int] = Body(...)):
+    """Unlink many agents from a workflow in one request"""
+    return await async_dbmanager.unlink_many(
+        link_type="workflow_agent", primary_id=workflow_id, secondary_ids=agent_ids, agent_type=agent_type
+    )
+
+
 @api.get("/sessions")
-async def list_sessions(user_id: str):
+async def list_sessions(
+    user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None
+):
     """List all sessions for a user"""
     filters = {"user_id": user_id}
-    return list_entity(Session, filters=filters)
+    return await list_entity(Session, filters=filters, limit=limit, cursor=cursor, fields=fields)
 
 
 @api.post("/sessions")
 async def create_session(session: Session):
     """Create a new session"""
-    return create_entity(session, Session)
+    return await create_entity(session, Session)
 
 
 @api.delete("/sessions/delete")
 async def delete_session(session_id: int, user_id: str):
     """Delete a session"""
     filters = {"id": session_id, "user_id": user_id}
-    return delete_entity(Session, filters=filters)
+    return await delete_entity(Session, filters=filters)
 
 
 @api.get("/sessions/{session_id}/messages")
-async def list_messages(user_id: str, session_id: int):
+async def list_messages(
+    user_id: str,
+    session_id: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
     """List all messages for a use session"""
     filters = {"user_id": user_id, "session_id": session_id}
-    return list_entity(Message, filters=filters, order="asc", return_json=True)
+    return await list_entity(
+        Message, filters=filters, order="asc", return_json=True, limit=limit, cursor=cursor, fields=fields
+    )
+
+
+async def load_session_history(message: Message, workflow: Dict, session: Optional[Session]) -> List[Dict]:
+    """
+    Load the messages of a session passed to the agents, oldest first, as selected by the workflow's
+    history strategy. Only the messages inside the history window are read from the database.
+    """
+    filters = {"user_id": message.user_id, "session_id": message.session_id}
+    strategy = workflow.get("history_strategy") or HistoryStrategy.all.value
+    max_messages = workflow.get("history_max_messages") or 20
+
+    if strategy == HistoryStrategy.all.value:
+        return (await async_dbmanager.get(Message, filters=filters, return_json=True, order="asc")).data
+
+    if strategy in (HistoryStrategy.last_n.value, HistoryStrategy.summary.value):
+        history = (
+            await async_dbmanager.get(Message, filters=filters, return_json=True, order="desc", limit=max_messages)
+        ).data[::-1]
+        if strategy == HistoryStrategy.summary.value and session is not None and session.summary:
+            history.insert(0, {"role": "user", "content": f"Summary of the earlier conversation:\n{session.summary}"})
+        return history
+
+    # token budget, read the newest messages a page at a time until the budget is spent
+    token_budget = workflow.get("history_max_tokens") or 4000
+    history = []
+    cursor = None
+    while True:
+        page = await async_dbmanager.get(
+            Message, filters=filters, return_json=True, order="desc", limit=50, cursor=cursor
+        )
+        for history_message in page.data:
+            token_budget -= count_tokens(history_message["content"] or "")
+            if token_budget < 0:
+                return history[::-1]
+            history.append(history_message)
+        cursor = page.next_cursor
+        if not cursor:
+            return history[::-1]
+
+
+async def refresh_session_summary(message: Message, workflow: Dict) -> None:
+    """
+    Refresh the summary of a session after a turn. The refreshes of a session run one at a time, turns
+    finishing while the summary is refreshed are merged into it by a single follow-up refresh.
+    """
+    session_id = message.session_id
+    if session_id in summary_refreshes:
+        summary_refreshes[session_id] = (message, workflow)
+        return
+    summary_refreshes[session_id] = None
+    try:
+        while True:
+            await _refresh_session_summary(message, workflow)
+            follow_up = summary_refreshes[session_id]
+            if follow_up is None:
+                break
+            message, workflow = follow_up
+            summary_refreshes[session_id] = None
+    finally:
+        del summary_refreshes[session_id]
+
+
+async def _refresh_session_summary(message: Message, workflow: Dict) -> None:
+    """
+    Merge the messages of a session that fell out of the workflow's history window since the summary
+    checkpoint into the session summary, so each refresh only summarizes new messages.
+    """
+    try:
+        sessions = (await async_dbmanager.get(Session, filters={"id": message.session_id})).data
+        if not sessions:
+            return
+        session = sessions[0]
+        filters = {"user_id": message.user_id, "session_id": message.session_id}
+        max_messages = workflow.get("history_max_messages") or 20
+        window = (
+            await async_dbmanager.get(Message, filters=filters, order="desc", limit=max_messages, fields=["id"])
+        ).data
+        if len(window) < max_messages:
+            return
+        window_ids = {window_message["id"] for window_message in window}
+
+        # continue after the newest message already in the summary
+        cursor = None
+        if session.summary_message_id is not None:
+            checkpoint = (
+                await async_dbmanager.get(Message, filters={"id": session.summary_message_id}, fields=["id"])
+            ).data
+            if checkpoint:
+                cursor = encode_cursor(checkpoint[0]["created_at"], checkpoint[0]["id"])
+        new_messages = []
+        for new_message in (
+            await async_dbmanager.get(
+                Message, filters=filters, return_json=True, order="asc", limit=summary_batch_size, cursor=cursor
+            )
+        ).data:
+            if new_message["id"] in window_ids:
+                break
+            new_messages.append(new_message)
+        if not new_messages:
+            return
+
+        summary = await managers["chat"].a_summarize_history(workflow, new_messages, session.summary)
+        if summary:
+            # only set the summary columns, and only if no other process moved the checkpoint meanwhile
+            await async_dbmanager.update(
+                Session,
+                filters={"id": session.id, "summary_message_id": session.summary_message_id},
+                values={"summary": summary, "summary_message_id": new_messages[-1]["id"]},
+            )
+    except Exception:
+        print(traceback.format_exc())
 
 
 @api.post("/sessions/{session_id}/workflow/{workflow_id}/run")
 async def run_session_workflow(message: Message, session_id: int, workflow_id: int):
     """Runs a workflow on provided message"""
     try:
+        workflow = await asyncio.to_thread(workflow_from_id, workflow_id, dbmanager=dbmanager)
+        session = None
+        if session_id is not None and workflow.get("history_strategy") == HistoryStrategy.summary.value:
+            sessions = (await async_dbmanager.get(Session, filters={"id": session_id})).data
+            session = sessions[0] if sessions else None
         user_message_history = (
-            dbmanager.get(
-                Message,
-                filters={"user_id": message.user_id, "session_id": message.session_id},
-                return_json=True,
-            ).data
-            if session_id is not None
-            else []
+            await load_session_history(message, workflow, session) if session_id is not None else []
         )
         # save incoming message
-        dbmanager.upsert(message)
+        await async_dbmanager.upsert(message)
         user_dir = os.path.join(folders["files_static_root"], "user", md5_hash(message.user_id))
         os.makedirs(user_dir, exist_ok=True)
-        workflow = workflow_from_id(workflow_id, dbmanager=dbmanager)
-        agent_response: Message = managers["chat"].chat(
+        agent_response: Message = await managers["chat"].a_chat(
             message=message,
             history=user_message_history,
             user_dir=user_dir,
@@ -392,7 +614,12 @@ async def run_session_workflow(message: Message, session_id: int, workflow_id: i
             connection_id=message.connection_id,
         )
 
-        response: Response = dbmanager.upsert(agent_response)
+        response: Response = await async_dbmanager.upsert(agent_response)
+        if session is not None:
+            # refresh the summary in the background, it is used from the next turn on
+            summary_task = asyncio.create_task(refresh_session_summary(message, workflow))
+            summary_tasks.add(summary_task)
+            summary_task.add_done_callback(summary_tasks.discard)
         return response.model_dump(mode="json")
     except Exception as ex_error:
         print(traceback.format_exc())
@@ -426,7 +653,8 @@ async def process_socket_message(data: dict, websocket: WebSocket, client_id: st
             "data": response,
             "connection_id": client_id,
         }
-        await websocket_manager.send_message(response_socket_message, websocket)
+        # queue behind the agent messages of the turn still waiting to be written, final responses are never dropped
+        websocket_manager.dispatch(response_socket_message)
 
 
 @api.websocket("/ws/{client_id}")
@@ -1,8 +1,13 @@
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
 
 import autogen
+from autogen.io import IOStream
 
 from .datamodel import (
     Agent,
@@ -10,7 +15,8 @@ from .datamodel import (
     Message,
     SocketMessage,
 )
-from .utils import clear_folder, get_skills_from_prompt, load_code_execution_config, sanitize_model
+from .codeexecutors import CodeExecutorPool
+from .utils import clear_folder, get_skills_from_prompt, load_code_execution_config, md5_hash, sanitize_model
 
 
 class WorkflowManager:
@@ -26,6 +32,8 @@ class WorkflowManager:
         clear_work_dir: bool = True,
         send_message_function: Optional[callable] = None,
         connection_id: Optional[str] = None,
+        stream_tokens: bool = False,
+        executor_pool: Optional[CodeExecutorPool] = None,
     ) -> None:
         """
         Initializes the AutoGenFlow with agents specified in the config and optional
@@ -34,11 +42,16 @@ class WorkflowManager:
         Args:
             config: The configuration settings for the sender and receiver agents.
             history: An optional list of previous messages to populate the agents' history.
+            stream_tokens: If set, LLM completions are streamed and partial output is sent as `agent_token` messages.
+            executor_pool: If set, the agents' code executors are taken from this pool and returned to it by `close`.
 
         """
         # TODO - improved typing for workflow
         self.send_message_function = send_message_function
         self.connection_id = connection_id
+        self.token_stream = TokenStream(self._send_tokens) if stream_tokens else None
+        self.executor_pool = executor_pool
+        self.code_executors = []
         self.work_dir = work_dir or "work_dir"
         if clear_work_dir:
             clear_folder(self.work_dir)
@@ -71,6 +84,7 @@ class WorkflowManager:
                         "admin_name",
                         "speaker_selection_method",
                         "allow_repeat_speaker",
+                        "skills_prompt_mode",
                     }
                 }
             )
@@ -133,28 +147,29 @@ class WorkflowManager:
 
     def _populate_history(self, history: List[Message]) -> None:
         """
-        Populates the agent message history from the provided list of messages.
+        Populates the agents' conversation from the provided list of messages in a single pass.
+        Messages are appended directly to the sender's and receiver's chat messages, exactly as
+        `send` would record them, without triggering any receive hooks or message processing.
 
         Args:
             history: A list of messages to populate the agents' history.
         """
+        sender_messages = self.sender.chat_messages[self.receiver]
+        receiver_messages = self.receiver.chat_messages[self.sender]
         for msg in history:
-            if isinstance(msg, dict):
-                msg = Message(**msg)
-            if msg.role == "user":
-                self.sender.send(
-                    msg.content,
-                    self.receiver,
-                    request_reply=False,
-                    silent=True,
-                )
-            elif msg.role == "assistant":
-                self.receiver.send(
-                    msg.content,
-                    self.sender,
-                    request_reply=False,
-                    silent=True,
-                )
+            role, content = (msg["role"], msg["content"]) if isinstance(msg, dict) else (msg.role, msg.content)
+            if role == "user":
+                speaker = self.sender
+            elif role == "assistant":
+                speaker = self.receiver
+            else:
+                continue
+            sender_messages.append(
+                {"content": content, "role": "assistant" if speaker is self.sender else "user", "name": speaker.name}
+            )
+            receiver_messages.append(
+                {"content": content, "role": "assistant" if speaker is self.receiver else "user", "name": speaker.name}
+            )
 
     def sanitize_agent(self, agent: Dict) -> Agent:
         """ """
@@ -185,12 +200,14 @@ class WorkflowManager:
             agent.config.llm_config.config_list = config_list
 
         agent.config.code_execution_config = load_code_execution_config(
-            agent.config.code_execution_config, work_dir=self.work_dir
+            agent.config.code_execution_config, work_dir=self.work_dir, executor_pool=self.executor_pool
         )
+        if agent.config.code_execution_config:
+            self.code_executors.append(agent.config.code_execution_config["executor"])
 
         if skills:
             skills_prompt = ""
-            skills_prompt = get_skills_from_prompt(skills, self.work_dir)
+            skills_prompt = get_skills_from_prompt(skills, self.work_dir, prompt_mode=agent.config.skills_prompt_mode)
             if agent.config.system_message:
                 agent.config.system_message = agent.config.system_message + "\n\n" + skills_prompt
             else:
@@ -227,20 +244,95 @@ class WorkflowManager:
             return agent
 
         else:
+            agent_config = self._serialize_agent(agent)
+            if self.token_stream and agent_config.get("llm_config"):
+                agent_config["llm_config"]["stream"] = True
             if agent.type == "assistant":
                 agent = ExtendedConversableAgent(
-                    **self._serialize_agent(agent),
+                    **agent_config,
                     message_processor=self.process_message,
                 )
             elif agent.type == "userproxy":
                 agent = ExtendedConversableAgent(
-                    **self._serialize_agent(agent),
+                    **agent_config,
                     message_processor=self.process_message,
                 )
             else:
                 raise ValueError(f"Unknown agent type: {agent.type}")
+            if self.token_stream:
+                agent.register_hook("process_all_messages_before_reply", self.token_stream.speaker_hook(agent.name))
             return agent
 
+    def _send_tokens(self, sender: str, content: str) -> None:
+        """
+        Sends a frame of streamed LLM output over the message queue.
+
+        Args:
+            sender: The name of the agent generating the output.
+            content: The output generated since the previous frame.
+        """
+        if self.send_message_function:
+            socket_msg = SocketMessage(
+                type="agent_token",
+                data={
+                    "sender": sender,
+                    "content": content,
+                    "timestamp": datetime.now().isoformat(),
+                    "connection_id": self.connection_id,
+                    "message_type": "agent_token",
+                },
+                connection_id=self.connection_id,
+            )
+            self.send_message_function(socket_msg.dict())
+
+    def start_turn(self, history: Optional[List[Message]] = None, connection_id: Optional[str] = None) -> None:
+        """
+        Prepares a previously used workflow manager for a new turn of the same session. The agents
+        and their clients are kept, but their conversation is cleared and populated from the given
+        history, so they see exactly what a newly built manager would see.
+
+        Args:
+            history: The session history to populate the agents' conversation with.
+            connection_id: The connection identifier of the client the new turn streams to.
+        """
+        self.connection_id = connection_id
+        self.agent_history = []
+        self._reset_agents(self.sender)
+        self._reset_agents(self.receiver)
+        if history:
+            self._populate_history(history)
+
+    def _reset_agents(self, agent: autogen.Agent) -> None:
+        # also clears the messages of a group chat, through the reset hook of the group chat manager
+        agent.reset()
+        if isinstance(agent, autogen.GroupChatManager):
+            for groupchat_agent in agent.groupchat.agents:
+                self._reset_agents(groupchat_agent)
+
+    def content_size(self) -> int:
+        """
+        Approximates the memory held by the agents' conversations as the number of characters of
+        message content they store.
+
+        Returns:
+            The total length of the message contents held by the sender and receiver agents.
+        """
+        size = 0
+        for agent in (self.sender, self.receiver):
+            for messages in agent.chat_messages.values():
+                size += sum(len(str(message.get("content") or "")) for message in messages)
+        return size
+
+    def close(self) -> None:
+        """
+        Returns the agents' code executors to the executor pool they were taken from. The manager
+        cannot run code afterwards.
+        """
+        if self.executor_pool is not None:
+            for executor in self.code_executors:
+                self.executor_pool.release(executor)
+        self.code_executors = []
+
     def run(self, message: str, clear_history: bool = False) -> None:
         """
         Initiates a chat between the sender and receiver agents with an initial message
@@ -250,11 +342,180 @@ class WorkflowManager:
             message: The initial message to start the chat.
             clear_history: If set to True, clears the chat history before initiating.
         """
-        self.sender.initiate_chat(
-            self.receiver,
-            message=message,
-            clear_history=clear_history,
+        if self.token_stream is None:
+            self.sender.initiate_chat(
+                self.receiver,
+                message=message,
+                clear_history=clear_history,
+            )
+            return
+        # the default IOStream is a context variable, so this only captures output of the current workflow
+        with IOStream.set_default(self.token_stream):
+            self.sender.initiate_chat(
+                self.receiver,
+                message=message,
+                clear_history=clear_history,
+            )
+
+
+class TokenStream:
+    """
+    An autogen IOStream that captures the deltas printed while an LLM completion is streamed and
+    forwards them in frames of at most one per `frame_interval` seconds, keeping socket overhead
+    low. All output is still echoed to the console stream.
+    """
+
+    def __init__(self, send_function: callable, frame_interval: float = 0.05) -> None:
+        """
+        Args:
+            send_function: Called with the name of the streaming agent and the buffered deltas of each frame.
+            frame_interval: The minimum number of seconds between two frames.
+        """
+        self.send_function = send_function
+        self.frame_interval = frame_interval
+        self.console = IOStream.get_global_default()
+        self.speaker: Optional[str] = None
+        self._buffer: List[str] = []
+        self._last_frame = 0.0
+
+    def speaker_hook(self, name: str) -> callable:
+        """
+        Returns a `process_all_messages_before_reply` hook that marks the agent as the current speaker.
+        """
+
+        def hook(messages: List[Dict]) -> List[Dict]:
+            self.flush()
+            self.speaker = name
+            return messages
+
+        return hook
+
+    def print(self, *objects: Any, sep: str = " ", end: str = "\n", flush: bool = False) -> None:
+        self.console.print(*objects, sep=sep, end=end, flush=flush)
+        text = sep.join(map(str, objects))
+        # streamed deltas are printed without a line ending, wrapped in terminal color codes
+        if text.startswith("\033["):
+            if text.startswith("\033[0m"):
+                self.flush()
+            return
+        if end == "" and flush:
+            self._buffer.append(text)
+            if time.monotonic() - self._last_frame >= self.frame_interval:
+                self.flush()
+
+    def input(self, prompt: str = "", *, password: bool = False) -> str:
+        return self.console.input(prompt, password=password)
+
+    def flush(self) -> None:
+        """
+        Sends the buffered deltas, if any, as one frame.
+        """
+        if self._buffer:
+            content = "".join(self._buffer)
+            self._buffer = []
+            self.send_function(self.speaker, content)
+        self._last_frame = time.monotonic()
+
+
+class WorkflowManagerPool:
+    """
+    Keeps the built WorkflowManagers of recently active sessions warm, so that follow-up turns in a
+    session reuse the agents (and their LLM clients and code executors) instead of rebuilding them.
+    The conversation is not carried over: `WorkflowManager.start_turn` repopulates it from the
+    session history of each turn.
+
+    A pooled manager is reused only for the same workflow spec, otherwise it is discarded and
+    rebuilt. Managers are evicted least recently used first when the pool exceeds `max_size`
+    entries or holds more than `max_content_size` characters of conversation, and when idle for
+    longer than `idle_ttl` seconds.
+    """
+
+    def __init__(self, max_size: int = 32, idle_ttl: float = 900, max_content_size: int = 20_000_000) -> None:
+        """
+        Initializes an empty pool.
+
+        Args:
+            max_size: The maximum number of pooled managers. A value of 0 disables pooling.
+            idle_ttl: Seconds after which an unused manager is evicted.
+            max_content_size: The maximum total number of message content characters held by pooled managers.
+        """
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.max_content_size = max_content_size
+        # session_id -> (workflow spec hash, content size, last used, manager)
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _spec_hash(workflow: Dict) -> str:
+        return md5_hash(json.dumps(workflow, sort_keys=True, default=str))
+
+    def acquire(self, session_id: Any, workflow: Dict) -> Optional[WorkflowManager]:
+        """
+        Takes the pooled manager of a session out of the pool if it runs the same workflow.
+
+        Args:
+            session_id: The session identifier.
+            workflow: The workflow spec the turn runs.
+
+        Returns:
+            The warm workflow manager, or None if the caller has to build a new one.
+        """
+        with self._lock:
+            evicted = self._evict(time.time())
+            entry = self._entries.pop(session_id, None)
+        self._close(evicted)
+        if entry is None:
+            return None
+        spec_hash, _, _, workflow_manager = entry
+        if spec_hash != self._spec_hash(workflow):
+            workflow_manager.close()
+            return None
+        return workflow_manager
+
+    def release(self, session_id: Any, workflow: Dict, workflow_manager: WorkflowManager) -> None:
+        """
+        Returns a manager to the pool after a successful turn.
+
+        Args:
+            session_id: The session identifier.
+            workflow: The workflow spec the turn ran.
+            workflow_manager: The manager that ran the turn.
+        """
+        if self.max_size <= 0:
+            workflow_manager.close()
+            return
+        entry = (
+            self._spec_hash(workflow),
+            workflow_manager.content_size(),
+            time.time(),
+            workflow_manager,
         )
+        with self._lock:
+            # a concurrent turn of the same session may have returned its manager first
+            displaced = self._entries.pop(session_id, None)
+            self._entries[session_id] = entry
+            evicted = self._evict(time.time())
+        if displaced is not None and displaced[3] is not workflow_manager:
+            evicted.append(displaced)
+        self._close(evicted)
+
+    def _evict(self, now: float) -> List[tuple]:
+        evicted = []
+        for session_id in [key for key, entry in self._entries.items() if now - entry[2] > self.idle_ttl]:
+            evicted.append(self._entries.pop(session_id))
+        content_size = sum(entry[1] for entry in self._entries.values())
+        while self._entries and (len(self._entries) > self.max_size or content_size > self.max_content_size):
+            _, entry = self._entries.popitem(last=False)
+            content_size -= entry[1]
+            evicted.append(entry)
+        return evicted
+
+    @staticmethod
+    def _close(evicted: List[tuple]) -> None:
+        # return the code executors of evicted managers to their pool outside the lock
+        for entry in evicted:
+            entry[3].close()
 
 
 class ExtendedConversableAgent(autogen.ConversableAgent):
@@ -40,7 +40,8 @@ export interface IAgentConfig {
   system_message: string | "";
   is_termination_msg?: boolean | string;
   default_auto_reply?: string | null;
-  code_execution_config?: "none" | "local" | "docker";
+  code_execution_config?: "none" | "local" | "kernel" | "docker";
+  skills_prompt_mode?: "full" | "signatures";
   description?: string;
 
   admin_name?: string;
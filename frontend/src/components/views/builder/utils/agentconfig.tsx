@@ -302,12 +302,34 @@ export const AgentConfigView = ({
                         [
                           { label: "None", value: "none" },
                           { label: "Local", value: "local" },
+                          { label: "Local kernel", value: "kernel" },
                           { label: "Docker", value: "docker" },
                         ] as any
                       }
                     />
                   }
                 />
+                <ControlRowView
+                  title="Skills Prompt"
+                  className="mt-4"
+                  description="Whether the prompt includes the full code of the skills or only their signatures and docstrings."
+                  value={agent.config.skills_prompt_mode || "full"}
+                  control={
+                    <Select
+                      className="mt-2 w-full"
+                      defaultValue={agent.config.skills_prompt_mode || "full"}
+                      onChange={(value: any) => {
+                        onControlChange(value, "skills_prompt_mode");
+                      }}
+                      options={
+                        [
+                          { label: "Full code", value: "full" },
+                          { label: "Signatures only", value: "signatures" },
+                        ] as any
+                      }
+                    />
+                  }
+                />
               </CollapseBox>
             </div>
           </div>